@@ -15,6 +15,7 @@ from pathlib import Path
 from datetime import timedelta
 
 from decouple import config
+from django.core.exceptions import ImproperlyConfigured
 
 AUTH_USER_MODEL = "users.User"
 
@@ -83,8 +84,16 @@ TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [os.path.join(BASE_DIR, "templates")],
-        "APP_DIRS": True,
         "OPTIONS": {
+            "loaders": [
+                (
+                    "django.template.loaders.cached.Loader",
+                    [
+                        "django.template.loaders.filesystem.Loader",
+                        "django.template.loaders.app_directories.Loader",
+                    ],
+                )
+            ],
             "context_processors": [
                 "django.template.context_processors.debug",
                 "django.template.context_processors.request",
@@ -120,6 +129,40 @@ else:
         }
     }
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+# The recipe caches are invalidated by bumping versions in the shared cache,
+# so every worker must see the same backend. LocMemCache is per process and
+# only fits the local SQLite setup; with PostgreSQL the default is
+# the database cache (run ``python manage.py createcachetable``), or point
+# CACHE_BACKEND at Redis or Memcached.
+
+if DEBUG:
+    CACHE_BACKEND = config(
+        "CACHE_BACKEND", default="django.core.cache.backends.db.DatabaseCache"
+    )
+    CACHE_LOCATION = config("CACHE_LOCATION", default="cookscorner_cache")
+    if CACHE_BACKEND == "django.core.cache.backends.locmem.LocMemCache":
+        raise ImproperlyConfigured(
+            "LocMemCache is not shared between workers; "
+            "set CACHE_BACKEND to a shared cache when using PostgreSQL."
+        )
+else:
+    CACHE_BACKEND = config(
+        "CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"
+    )
+    CACHE_LOCATION = config("CACHE_LOCATION", default="cookscorner")
+
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKEND,
+        "LOCATION": CACHE_LOCATION,
+        "KEY_PREFIX": config("CACHE_KEY_PREFIX", default="cookscorner"),
+        "TIMEOUT": config("CACHE_TIMEOUT", default=3600, cast=int),
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -171,7 +214,7 @@ SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication"
+        "users.authentication.CachedJWTAuthentication"
     ],
 }
 
@@ -183,9 +226,16 @@ CLOUDINARY_STORAGE = {
 }
 
 DEFAULT_FILE_STORAGE = "cloudinary_storage.storage.MediaCloudinaryStorage"
+UPLOAD_BACKEND = config(
+    "UPLOAD_BACKEND", default="utils.uploads.CloudinaryUploadBackend"
+)
 
 # Email settings
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+EMAIL_BACKEND = config(
+    "EMAIL_BACKEND", default="django.core.mail.backends.smtp.EmailBackend"
+)
+EMAIL_FILE_PATH = config("EMAIL_FILE_PATH", default=str(BASE_DIR / "sent_emails"))
+EMAIL_TIMEOUT = config("EMAIL_TIMEOUT", default=30, cast=int)
 EMAIL_HOST = "smtp.gmail.com"
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
@@ -201,6 +251,7 @@ SIMPLE_JWT = {
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
     "AUTH_HEADER_TYPES": ("Bearer",),
+    "TOKEN_REFRESH_SERIALIZER": "users.serializers.TokenRefreshSerializer",
 }
 
 SWAGGER_SETTINGS = {
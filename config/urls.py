@@ -21,6 +21,9 @@ from rest_framework import permissions
 from drf_yasg import openapi
 from drf_yasg.views import get_schema_view
 
+from utils.cache import CacheStatsAPIView
+from utils.uploads import LocalUploadAPIView
+
 
 schema_view = get_schema_view(
     openapi.Info(
@@ -55,4 +58,14 @@ urlpatterns = [
     path("cookscorner/users/", include("users.urls")),
     path("cookscorner/profile/", include("userprofile.urls")),
     path("cookscorner/recipes/", include("receipts.urls")),
+    path(
+        "cookscorner/uploads/local/",
+        LocalUploadAPIView.as_view(),
+        name="cookscorner-local-upload",
+    ),
+    path(
+        "cookscorner/cache-stats/",
+        CacheStatsAPIView.as_view(),
+        name="cookscorner-cache-stats",
+    ),
 ]
@@ -8,6 +8,10 @@ python manage.py collectstatic --noinput
 echo "Apply database migrations"
 python manage.py migrate
 
+# Create the shared cache table
+echo "Create cache table"
+python manage.py createcachetable
+
 # Start server
 echo "Starting server"
 gunicorn config.wsgi:application -w 4 -b 0.0.0.0:8001
\ No newline at end of file
@@ -0,0 +1,114 @@
+from django.core.cache import cache
+
+from .models import Ingredient, Recipe
+from utils.cache import (
+    bump_versions,
+    get_cache_stats,
+    get_or_compute,
+    get_version,
+    get_versions,
+)
+from utils.deferred import OnCommitBatch
+from utils.local_cache import LocalCache
+
+RECIPE_DETAIL_TIMEOUT = 60 * 60
+RECIPE_CARD_TIMEOUT = 60 * 60
+
+detail_stats = get_cache_stats("recipe_detail")
+card_stats = get_cache_stats("recipe_card")
+
+ingredient_ids = LocalCache("ingredient_ids", max_size=10000, timeout=60 * 60)
+
+
+def get_ingredient_ids(names):
+    """
+    Maps the known ingredient names to ids. Unknown names are not cached,
+    so ingredients created later are found on the next call.
+    """
+    found = ingredient_ids.get_many(names)
+    missing = [name for name in names if name not in found]
+    if missing:
+        rows = dict(
+            Ingredient.objects.filter(ingredient_name__in=missing).values_list(
+                "ingredient_name", "id"
+            )
+        )
+        ingredient_ids.set_many(rows)
+        found.update(rows)
+    return found
+
+
+def recipe_version_key(slug):
+    return f"recipe:{slug}:version"
+
+
+def get_recipe_version(slug):
+    return get_version(recipe_version_key(slug))
+
+
+def get_cached_recipe_detail(slug, compute, version=None):
+    """
+    Returns the shared part of the recipe detail payload, computing and
+    storing it with ``compute()`` on a miss.
+    """
+    if version is None:
+        version = get_recipe_version(slug)
+    key = f"recipe:{slug}:detail:{version}"
+    return get_or_compute(key, compute, RECIPE_DETAIL_TIMEOUT, stats=detail_stats)
+
+
+def recipe_card_version_key(recipe_id):
+    return f"recipe:{recipe_id}:card:version"
+
+
+def recipe_card_key(recipe_id, version):
+    return f"recipe:{recipe_id}:card:{version}"
+
+
+def get_recipe_card_versions(recipe_ids):
+    """
+    ``{recipe_id: version}`` of the cached cards, read with one ``get_many``.
+    """
+    versions = get_versions([recipe_card_version_key(pk) for pk in recipe_ids])
+    return {pk: versions[recipe_card_version_key(pk)] for pk in recipe_ids}
+
+
+def get_cached_recipe_cards(recipe_ids, compute, versions=None):
+    """
+    Returns ``{recipe_id: card}`` for the given ids with one ``get_many``
+    for the versions (unless ``versions`` is passed) and one for the cards;
+    the missing cards are built together by ``compute(missing_ids)`` and
+    stored with one ``set_many``. Cards are keyed by version, so a card
+    computed before an invalidation is stored under a key nobody reads
+    anymore.
+    """
+    if versions is None:
+        versions = get_recipe_card_versions(recipe_ids)
+    card_keys = {pk: recipe_card_key(pk, versions[pk]) for pk in recipe_ids}
+    cached = cache.get_many(list(card_keys.values()))
+    cards = {pk: cached[key] for pk, key in card_keys.items() if key in cached}
+    missing = [pk for pk in recipe_ids if pk not in cards]
+    card_stats.hit(len(cards))
+    card_stats.miss(len(missing))
+    if missing:
+        computed = compute(missing)
+        cache.set_many(
+            {card_keys[pk]: card for pk, card in computed.items()},
+            RECIPE_CARD_TIMEOUT,
+        )
+        cards.update(computed)
+    return cards
+
+
+def _invalidate_pending(pending):
+    bump_versions(recipe_card_version_key(pk) for pk in pending)
+    slugs = {slug for values in pending.values() for slug in values}
+    unknown = [pk for pk, values in pending.items() if not values]
+    if unknown:
+        slugs.update(
+            Recipe.objects.filter(pk__in=unknown).values_list("slug", flat=True)
+        )
+    bump_versions(recipe_version_key(slug) for slug in slugs)
+
+
+schedule_recipe_invalidation = OnCommitBatch(_invalidate_pending).add
@@ -0,0 +1,142 @@
+import heapq
+
+from django.db import transaction
+
+from .models import FeedEntry, FeedFanoutJob, FeedPullEntry, Recipe
+from userprofile.models import UserProfile
+from utils.pagination import decode_cursor, encode_cursor, keyset_filter
+
+FEED_ORDERING = ("-created_at", "-recipe_id")
+RECIPE_FEED_ORDERING = ("-created_at", "-id")
+FANOUT_BATCH_SIZE = 1000
+# Recipes of chefs with at least this many followers are not fanned out on
+# write; they get a FeedPullEntry and are merged into feeds on read instead.
+FANOUT_MAX_FOLLOWERS = 10000
+FOLLOW_BACKFILL_SIZE = 50
+
+Follow = UserProfile.following.through
+
+
+def enqueue_fanout(recipe):
+    if recipe.author.followers_count < FANOUT_MAX_FOLLOWERS:
+        FeedFanoutJob.objects.create(recipe=recipe)
+    else:
+        FeedPullEntry.objects.create(
+            recipe=recipe, author_id=recipe.author_id, created_at=recipe.created_at
+        )
+
+
+def run_fanout_job(job, batch_size=FANOUT_BATCH_SIZE):
+    """
+    Pushes the job's recipe into the timelines of the next batch of the
+    author's followers. Returns whether the job is finished.
+    """
+    recipe = job.recipe
+    follower_ids = list(
+        Follow.objects.filter(
+            to_userprofile_id=recipe.author_id,
+            from_userprofile_id__gt=job.last_follower_id,
+        )
+        .order_by("from_userprofile_id")
+        .values_list("from_userprofile_id", flat=True)[:batch_size]
+    )
+    FeedEntry.objects.bulk_create(
+        [
+            FeedEntry(
+                owner_id=follower_id,
+                recipe_id=recipe.pk,
+                author_id=recipe.author_id,
+                created_at=recipe.created_at,
+            )
+            for follower_id in follower_ids
+        ],
+        ignore_conflicts=True,
+    )
+    if len(follower_ids) < batch_size:
+        job.delete()
+        return True
+    job.last_follower_id = follower_ids[-1]
+    job.save(update_fields=["last_follower_id"])
+    return False
+
+
+def process_fanout_batch(batch_size=FANOUT_BATCH_SIZE):
+    """
+    Runs one batch of the oldest pending job. Returns False when there is
+    nothing to do.
+    """
+    with transaction.atomic():
+        job = (
+            FeedFanoutJob.objects.select_for_update(skip_locked=True)
+            .select_related("recipe")
+            .order_by("pk")
+            .first()
+        )
+        if job is None:
+            return False
+        run_fanout_job(job, batch_size)
+    return True
+
+
+def update_feed_on_follow(profile_id, target_id, value):
+    if not value:
+        FeedEntry.objects.filter(owner_id=profile_id, author_id=target_id).delete()
+        return
+    target = UserProfile.objects.filter(pk=target_id).values("followers_count")
+    if target.get()["followers_count"] >= FANOUT_MAX_FOLLOWERS:
+        return
+    recipes = (
+        Recipe.objects.filter(author_id=target_id, feed_pull_entry__isnull=True)
+        .order_by(*RECIPE_FEED_ORDERING)
+        .values_list("pk", "created_at")[:FOLLOW_BACKFILL_SIZE]
+    )
+    FeedEntry.objects.bulk_create(
+        [
+            FeedEntry(
+                owner_id=profile_id,
+                recipe_id=recipe_id,
+                author_id=target_id,
+                created_at=created_at,
+            )
+            for recipe_id, created_at in recipes
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def get_feed_page(profile_id, cursor, limit):
+    """
+    Reads one page of the profile's timeline, merged with the pull entries
+    of followed chefs, i.e. the recipes that were too widely followed to
+    fan out. Returns the recipe ids and the cursor of the next page.
+    """
+    entries = FeedEntry.objects.filter(owner_id=profile_id)
+    merged = FeedPullEntry.objects.filter(
+        author__in=Follow.objects.filter(from_userprofile_id=profile_id).values(
+            "to_userprofile_id"
+        )
+    )
+    if cursor:
+        values, _ = decode_cursor(cursor, FEED_ORDERING, FeedEntry)
+        entries = entries.filter(keyset_filter(FEED_ORDERING, values))
+        merged = merged.filter(keyset_filter(FEED_ORDERING, values))
+    rows = heapq.merge(
+        *(
+            queryset.order_by(*FEED_ORDERING).values_list("created_at", "recipe_id")[
+                : limit + 1
+            ]
+            for queryset in (entries, merged)
+        ),
+        reverse=True,
+    )
+    page = []
+    seen = set()
+    for row in rows:
+        if row[1] in seen:
+            continue
+        seen.add(row[1])
+        page.append(row)
+        if len(page) > limit:
+            break
+    next_cursor = encode_cursor(page[limit - 1]) if len(page) > limit else None
+    return [recipe_id for _, recipe_id in page[:limit]], next_cursor
@@ -0,0 +1,22 @@
+from userprofile.cache import schedule_profile_invalidation
+from userprofile.models import UserProfile
+from utils.images import ImageVariantsSpec
+
+from .cache import schedule_recipe_invalidation
+from .models import Recipe
+
+IMAGE_VARIANT_SPECS = (
+    ImageVariantsSpec(
+        Recipe,
+        "meal_picture",
+        "meal_picture_variants",
+        on_update=schedule_recipe_invalidation,
+        touch_field="updated_at",
+    ),
+    ImageVariantsSpec(
+        UserProfile,
+        "profile_picture",
+        "profile_picture_variants",
+        on_update=schedule_profile_invalidation,
+    ),
+)
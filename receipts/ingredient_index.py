@@ -0,0 +1,96 @@
+from django.db import transaction
+from django.db.models import Count, F, FloatField
+from django.db.models.functions import Cast
+
+from .cache import get_ingredient_ids
+from .models import IngredientPosting, RecipeIngredients
+from utils.deferred import OnCommitBatch
+
+MAX_QUERY_INGREDIENTS = 30
+
+
+def sync_recipe_postings(recipe_id):
+    """
+    Brings the recipe's postings in line with its RecipeIngredients rows.
+    Only the recipe's own rows are written, so recipes sharing a popular
+    ingredient are indexed without waiting on each other.
+    """
+    current = set(
+        RecipeIngredients.objects.filter(recipe_id=recipe_id).values_list(
+            "ingredient_id", flat=True
+        )
+    )
+    with transaction.atomic():
+        IngredientPosting.objects.filter(recipe_id=recipe_id).exclude(
+            ingredient_id__in=current
+        ).delete()
+        IngredientPosting.objects.bulk_create(
+            [
+                IngredientPosting(
+                    ingredient_id=ingredient_id,
+                    recipe_id=recipe_id,
+                    required=len(current),
+                )
+                for ingredient_id in current
+            ],
+            update_conflicts=True,
+            unique_fields=["ingredient", "recipe"],
+            update_fields=["required"],
+        )
+
+
+def rebuild_postings(batch_size=500):
+    """
+    Rebuilds the whole index from RecipeIngredients.
+    """
+    rows = RecipeIngredients.objects.order_by().values_list(
+        "recipe_id", "ingredient_id"
+    )
+    ingredients_by_recipe = {}
+    for recipe_id, ingredient_id in rows.iterator(chunk_size=10000):
+        ingredients_by_recipe.setdefault(recipe_id, set()).add(ingredient_id)
+    postings = [
+        IngredientPosting(
+            ingredient_id=ingredient_id,
+            recipe_id=recipe_id,
+            required=len(ingredient_ids),
+        )
+        for recipe_id, ingredient_ids in ingredients_by_recipe.items()
+        for ingredient_id in ingredient_ids
+    ]
+    with transaction.atomic():
+        IngredientPosting.objects.all().delete()
+        IngredientPosting.objects.bulk_create(postings, batch_size=batch_size)
+    return len(postings)
+
+
+def find_recipes_by_ingredients(names, limit):
+    """
+    Ranks recipes by the share of their ingredients found in ``names``, then
+    by the number still missing, then by the number matched. The matches
+    are counted and ranked by the database, which returns only the top
+    ``limit``. Returns ``(recipe_id, matched, required)``.
+    """
+    ingredient_ids = get_ingredient_ids(names[:MAX_QUERY_INGREDIENTS])
+    if not ingredient_ids:
+        return []
+    ranked = (
+        IngredientPosting.objects.filter(ingredient_id__in=ingredient_ids.values())
+        .values("recipe_id", "required")
+        .annotate(matched=Count("pk"))
+        .annotate(
+            coverage=Cast("matched", FloatField()) / F("required"),
+            missing=F("required") - F("matched"),
+        )
+        .order_by("-coverage", "missing", "-matched", "-recipe_id")
+        .values_list("recipe_id", "matched", "required")
+    )
+    return list(ranked[:limit])
+
+
+def _sync_pending(pending):
+    for recipe_id in pending:
+        sync_recipe_postings(recipe_id)
+
+
+schedule_recipe_postings = OnCommitBatch(_sync_pending).add
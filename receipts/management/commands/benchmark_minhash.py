@@ -0,0 +1,130 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from receipts.minhash import (
+    MAX_SIMILAR_CANDIDATES,
+    find_similar_by_ingredients,
+    jaccard,
+    rebuild_minhashes,
+)
+from receipts.models import Ingredient, Recipe, RecipeIngredients
+from userprofile.models import UserProfile
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare find_similar_by_ingredients against exact Jaccard on a "
+        "synthetic corpus and report recall@k and timings. The corpus is "
+        "written to the database inside a transaction that is rolled back; "
+        "run it against a development database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--recipes", type=int, default=5000)
+        parser.add_argument("--ingredients", type=int, default=800)
+        parser.add_argument("--queries", type=int, default=200)
+        parser.add_argument("--k", type=int, default=6)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        k = options["k"]
+        with transaction.atomic():
+            corpus = self.create_corpus(rng, options["recipes"], options["ingredients"])
+
+            started = time.perf_counter()
+            rebuild_minhashes()
+            build_time = time.perf_counter() - started
+
+            queries = rng.sample(list(corpus), min(options["queries"], len(corpus)))
+            exact_time = lsh_time = 0.0
+            hits = relevant = 0
+            for key in queries:
+                started = time.perf_counter()
+                scored = [
+                    (jaccard(corpus[key], other), other_key)
+                    for other_key, other in corpus.items()
+                    if other_key != key
+                ]
+                scored.sort(reverse=True)
+                expected = {other_key for score, other_key in scored[:k] if score > 0}
+                exact_time += time.perf_counter() - started
+
+                started = time.perf_counter()
+                found = set(find_similar_by_ingredients(key, k))
+                lsh_time += time.perf_counter() - started
+
+                hits += len(expected & found)
+                relevant += len(expected)
+            transaction.set_rollback(True)
+
+        recall = hits / relevant if relevant else 1.0
+        self.stdout.write(f"Index build: {build_time:.2f}s for {len(corpus)} recipes")
+        self.stdout.write(
+            f"Exact Jaccard: {exact_time / len(queries) * 1000:.2f} ms/query"
+        )
+        self.stdout.write(
+            f"MinHash LSH:   {lsh_time / len(queries) * 1000:.2f} ms/query "
+            f"(at most {MAX_SIMILAR_CANDIDATES} candidates)"
+        )
+        self.stdout.write(f"Recall@{k}: {recall:.3f}")
+
+    def create_corpus(self, rng, recipes, ingredients):
+        """
+        Writes the generated recipes and returns ``{recipe_id: ingredient_ids}``.
+        """
+        user = User.objects.create_user(
+            email="minhash-benchmark@example.com", password=None
+        )
+        author = UserProfile.objects.create(user=user, username="minhash-benchmark")
+        ingredient_ids = [
+            ingredient.pk
+            for ingredient in Ingredient.objects.bulk_create(
+                Ingredient(ingredient_name=f"minhash-benchmark-{index}")
+                for index in range(ingredients)
+            )
+        ]
+        generated = self.generate(rng, recipes, ingredients)
+        created = Recipe.objects.bulk_create(
+            Recipe(
+                author=author,
+                name=f"minhash-benchmark-{key}",
+                description="",
+                meal_picture="cookscorner/recipe_images/benchmark.jpeg",
+            )
+            for key in generated
+        )
+        corpus = {}
+        rows = []
+        for recipe, indexes in zip(created, generated.values()):
+            corpus[recipe.pk] = {ingredient_ids[index] for index in indexes}
+            rows.extend(
+                RecipeIngredients(
+                    recipe=recipe, ingredient_id=ingredient_id, amount="1", unit="g"
+                )
+                for ingredient_id in corpus[recipe.pk]
+            )
+        RecipeIngredients.objects.bulk_create(rows, batch_size=1000)
+        return corpus
+
+    def generate(self, rng, recipes, ingredients):
+        """
+        Recipes are variations of a smaller set of base dishes, so that
+        near-duplicates exist the way they do in real data.
+        """
+        bases = [
+            rng.sample(range(ingredients), rng.randint(5, 15))
+            for _ in range(max(recipes // 20, 1))
+        ]
+        corpus = {}
+        for key in range(recipes):
+            ingredient_ids = set(rng.choice(bases))
+            for ingredient_id in rng.sample(sorted(ingredient_ids), rng.randint(0, 2)):
+                ingredient_ids.discard(ingredient_id)
+            ingredient_ids.update(rng.sample(range(ingredients), rng.randint(0, 3)))
+            corpus[key] = ingredient_ids
+        return corpus
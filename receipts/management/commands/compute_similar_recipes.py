@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from receipts.recommendations import (
+    LOAD_CHUNK_SIZE,
+    NEIGHBORS_PER_RECIPE,
+    ROW_BATCH_SIZE,
+    compute_similar_recipes,
+)
+
+
+class Command(BaseCommand):
+    help = "Recompute item-to-item recipe neighbors from likes and saves."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--neighbors", type=int, default=NEIGHBORS_PER_RECIPE)
+        parser.add_argument("--batch-size", type=int, default=ROW_BATCH_SIZE)
+        parser.add_argument("--chunk-size", type=int, default=LOAD_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        total = compute_similar_recipes(
+            k=options["neighbors"],
+            batch_size=options["batch_size"],
+            chunk_size=options["chunk_size"],
+        )
+        self.stdout.write(f"Computed neighbors for {total} recipes.")
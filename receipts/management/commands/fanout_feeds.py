@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from receipts.feed import FANOUT_BATCH_SIZE, process_fanout_batch
+
+
+class Command(BaseCommand):
+    help = "Push new recipes into followers' feeds in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=FANOUT_BATCH_SIZE)
+        parser.add_argument(
+            "--loop", action="store_true", help="Keep polling for new jobs."
+        )
+        parser.add_argument("--sleep", type=float, default=1.0)
+
+    def handle(self, *args, **options):
+        batches = 0
+        while True:
+            if process_fanout_batch(options["batch_size"]):
+                batches += 1
+            elif options["loop"]:
+                time.sleep(options["sleep"])
+            else:
+                break
+        self.stdout.write(f"Processed {batches} fan-out batches.")
@@ -0,0 +1,37 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from receipts.images import IMAGE_VARIANT_SPECS
+from utils.images import IMAGE_BATCH_SIZE, process_pending_images
+
+
+class Command(BaseCommand):
+    help = (
+        "Render resized WebP/JPEG variants of recipe and profile pictures "
+        "in a process pool."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=IMAGE_BATCH_SIZE)
+        parser.add_argument("--workers", type=int, default=None)
+        parser.add_argument(
+            "--loop", action="store_true", help="Keep polling for new images."
+        )
+        parser.add_argument("--sleep", type=float, default=2.0)
+
+    def handle(self, *args, **options):
+        processed = 0
+        with ProcessPoolExecutor(max_workers=options["workers"]) as executor:
+            while True:
+                handled = process_pending_images(
+                    IMAGE_VARIANT_SPECS, executor, options["batch_size"]
+                )
+                processed += handled
+                if handled:
+                    continue
+                if not options["loop"]:
+                    break
+                time.sleep(options["sleep"])
+        self.stdout.write(f"Processed {processed} images.")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from receipts.ingredient_index import rebuild_postings
+
+
+class Command(BaseCommand):
+    help = "Rebuild the ingredient -> recipes inverted index from scratch."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        total = rebuild_postings(batch_size=options["batch_size"])
+        self.stdout.write(f"Rebuilt {total} ingredient postings.")
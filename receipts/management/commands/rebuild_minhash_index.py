@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from receipts.minhash import rebuild_minhashes
+
+
+class Command(BaseCommand):
+    help = "Rebuild MinHash signatures and LSH buckets of all recipes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        total = rebuild_minhashes(batch_size=options["batch_size"])
+        self.stdout.write(f"Rebuilt MinHash signatures for {total} recipes.")
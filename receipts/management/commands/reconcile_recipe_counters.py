@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from receipts.models import Recipe
+from receipts.services import recount_recipe_counters
+
+
+class Command(BaseCommand):
+    help = "Recompute drifted likes_count/saves_count values on recipes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        last_id = 0
+        fixed = 0
+        while True:
+            ids = list(
+                Recipe.objects.filter(pk__gt=last_id)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+            fixed += len(recount_recipe_counters(ids))
+            last_id = ids[-1]
+        self.stdout.write(f"Fixed counters on {fixed} recipes.")
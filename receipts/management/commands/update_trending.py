@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from receipts.trending import HALF_LIFE, update_trending_scores
+
+
+class Command(BaseCommand):
+    help = "Refresh the time-decayed trending scores of recipes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--half-life-hours",
+            type=float,
+            default=HALF_LIFE.total_seconds() / 3600,
+        )
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        updated = update_trending_scores(
+            half_life=timedelta(hours=options["half_life_hours"]),
+            chunk_size=options["chunk_size"],
+        )
+        self.stdout.write(f"Updated trending scores of {updated} recipes.")
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.10 on 2026-10-18 12:46
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def _relation_count(through):
+    counts = (
+        through.objects.filter(recipe=OuterRef("pk"))
+        .order_by()
+        .values("recipe")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def populate_counters(apps, schema_editor):
+    Recipe = apps.get_model("receipts", "Recipe")
+    Recipe.objects.update(
+        likes_count=_relation_count(Recipe.liked_by.through),
+        saves_count=_relation_count(Recipe.saved_by.through),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("receipts", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="likes_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="saves_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
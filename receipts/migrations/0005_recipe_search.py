@@ -0,0 +1,87 @@
+# Generated by Django 4.2.10 on 2026-10-18 12:48
+
+import django.contrib.postgres.search
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# The search engines as they were at this migration; receipts.search may
+# change later without affecting it.
+def install_search(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS receipts_recipesearchdocument_gin "
+            "ON receipts_recipesearchdocument USING gin (document)"
+        )
+        schema_editor.execute(
+            """
+            INSERT INTO receipts_recipesearchdocument (recipe_id, document)
+            SELECT r.id,
+                setweight(to_tsvector('russian'::regconfig, r.name), 'A')
+                || setweight(to_tsvector('russian'::regconfig,
+                    coalesce(string_agg(i.ingredient_name, ' '), '')), 'B')
+                || setweight(to_tsvector('russian'::regconfig, r.description), 'C')
+            FROM receipts_recipe r
+            LEFT JOIN receipts_recipeingredients ri ON ri.recipe_id = r.id
+            LEFT JOIN receipts_ingredient i ON i.id = ri.ingredient_id
+            GROUP BY r.id
+            ON CONFLICT (recipe_id) DO UPDATE SET document = EXCLUDED.document
+            """
+        )
+    elif vendor == "sqlite":
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS receipts_recipe_fts "
+            "USING fts5(name, ingredients, description, "
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            """
+            INSERT INTO receipts_recipe_fts (rowid, name, ingredients, description)
+            SELECT r.id, r.name,
+                coalesce(group_concat(i.ingredient_name, ' '), ''),
+                r.description
+            FROM receipts_recipe r
+            LEFT JOIN receipts_recipeingredients ri ON ri.recipe_id = r.id
+            LEFT JOIN receipts_ingredient i ON i.id = ri.ingredient_id
+            GROUP BY r.id
+            """
+        )
+
+
+def uninstall_search(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS receipts_recipesearchdocument_gin")
+    elif vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS receipts_recipe_fts")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("receipts", "0004_recipe_ordering_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecipeSearchDocument",
+            fields=[
+                (
+                    "recipe",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="search_document",
+                        serialize=False,
+                        to="receipts.recipe",
+                        verbose_name="recipe",
+                    ),
+                ),
+                (
+                    "document",
+                    django.contrib.postgres.search.SearchVectorField(null=True),
+                ),
+            ],
+        ),
+        migrations.RunPython(install_search, uninstall_search),
+    ]
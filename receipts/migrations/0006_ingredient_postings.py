@@ -0,0 +1,31 @@
+# Generated by Django 4.2.10 on 2026-10-18 12:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("receipts", "0005_recipe_search"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IngredientPosting",
+            fields=[
+                (
+                    "ingredient",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="posting",
+                        serialize=False,
+                        to="receipts.ingredient",
+                        verbose_name="ingredient",
+                    ),
+                ),
+                ("recipe_ids", models.BinaryField(default=bytes)),
+                ("required", models.BinaryField(default=bytes)),
+            ],
+        ),
+    ]
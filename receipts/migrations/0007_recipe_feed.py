@@ -0,0 +1,99 @@
+# Generated by Django 4.2.10 on 2026-10-18 12:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("userprofile", "0003_profile_followers_count"),
+        ("receipts", "0006_ingredient_postings"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FeedFanoutJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("last_follower_id", models.BigIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "recipe",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="fanout_job",
+                        to="receipts.recipe",
+                        verbose_name="recipe",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="FeedEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField()),
+                (
+                    "author",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="userprofile.userprofile",
+                        verbose_name="author",
+                    ),
+                ),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="feed_entries",
+                        to="userprofile.userprofile",
+                        verbose_name="owner",
+                    ),
+                ),
+                (
+                    "recipe",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="feed_entries",
+                        to="receipts.recipe",
+                        verbose_name="recipe",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["owner", "-created_at", "-recipe"],
+                        name="receipts_fe_owner_i_a4f9cf_idx",
+                    ),
+                    models.Index(
+                        fields=["owner", "author"],
+                        name="receipts_fe_owner_i_014fbb_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="feedentry",
+            constraint=models.UniqueConstraint(
+                fields=("owner", "recipe"), name="unique_feed_entry"
+            ),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.10 on 2026-10-18 12:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("receipts", "0007_recipe_feed"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TrendingRecipe",
+            fields=[
+                (
+                    "recipe",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="trending",
+                        serialize=False,
+                        to="receipts.recipe",
+                        verbose_name="recipe",
+                    ),
+                ),
+                (
+                    "category",
+                    models.CharField(
+                        choices=[
+                            ("Breakfast", "Breakfast"),
+                            ("Lunch", "Lunch"),
+                            ("Dinner", "Dinner"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("score", models.FloatField(default=0)),
+                ("likes_seen", models.PositiveIntegerField(default=0)),
+                ("saves_seen", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField()),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["category", "-score"],
+                        name="receipts_tr_categor_091606_idx",
+                    )
+                ],
+            },
+        ),
+    ]
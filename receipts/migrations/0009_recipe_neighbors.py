@@ -0,0 +1,61 @@
+# Generated by Django 4.2.10 on 2026-10-18 12:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("receipts", "0008_trending_recipes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecipeNeighbor",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("score", models.FloatField()),
+                ("rank", models.PositiveSmallIntegerField()),
+                ("computed_at", models.DateTimeField()),
+                (
+                    "neighbor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="receipts.recipe",
+                        verbose_name="neighbor",
+                    ),
+                ),
+                (
+                    "recipe",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="neighbors",
+                        to="receipts.recipe",
+                        verbose_name="recipe",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["recipe", "rank"], name="receipts_re_recipe__e7cb2e_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="recipeneighbor",
+            constraint=models.UniqueConstraint(
+                fields=("recipe", "neighbor"), name="unique_recipe_neighbor"
+            ),
+        ),
+    ]
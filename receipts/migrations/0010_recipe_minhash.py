@@ -0,0 +1,125 @@
+# Generated by Django 4.2.10 on 2026-10-18 12:59
+
+import hashlib
+import random
+from array import array
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# MinHash as defined at this migration; receipts.minhash may change later
+# (and rebuild_minhash_index rebuilds with the current definition).
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def _permutations():
+    rng = random.Random(20240719)
+    return [
+        (rng.randrange(1, _PRIME), rng.randrange(0, _PRIME))
+        for _ in range(NUM_PERMUTATIONS)
+    ]
+
+
+def build_minhashes(apps, schema_editor):
+    RecipeIngredients = apps.get_model("receipts", "RecipeIngredients")
+    RecipeMinHash = apps.get_model("receipts", "RecipeMinHash")
+    RecipeLSHBucket = apps.get_model("receipts", "RecipeLSHBucket")
+    permutations = _permutations()
+    ingredients_by_recipe = {}
+    rows = RecipeIngredients.objects.order_by().values_list(
+        "recipe_id", "ingredient_id"
+    )
+    for recipe_id, ingredient_id in rows.iterator(chunk_size=10000):
+        ingredients_by_recipe.setdefault(recipe_id, set()).add(ingredient_id)
+    signatures, buckets = [], []
+    for recipe_id, values in ingredients_by_recipe.items():
+        sig = array(
+            "Q",
+            [
+                min(((a * value + b) % _PRIME) & _MAX_HASH for value in values)
+                for a, b in permutations
+            ],
+        )
+        signatures.append(RecipeMinHash(recipe_id=recipe_id, signature=sig.tobytes()))
+        for band in range(BANDS):
+            rows = sig[band * ROWS_PER_BAND : (band + 1) * ROWS_PER_BAND]
+            digest = hashlib.blake2b(rows.tobytes(), digest_size=8).digest()
+            buckets.append(
+                RecipeLSHBucket(
+                    recipe_id=recipe_id,
+                    band=band,
+                    bucket=int.from_bytes(digest, "big", signed=True),
+                )
+            )
+    RecipeMinHash.objects.bulk_create(signatures, batch_size=500)
+    RecipeLSHBucket.objects.bulk_create(buckets, batch_size=500)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("receipts", "0009_recipe_neighbors"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecipeMinHash",
+            fields=[
+                (
+                    "recipe",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="minhash",
+                        serialize=False,
+                        to="receipts.recipe",
+                        verbose_name="recipe",
+                    ),
+                ),
+                ("signature", models.BinaryField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name="RecipeLSHBucket",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("band", models.PositiveSmallIntegerField()),
+                ("bucket", models.BigIntegerField()),
+                (
+                    "recipe",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="lsh_buckets",
+                        to="receipts.recipe",
+                        verbose_name="recipe",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["band", "bucket"], name="receipts_re_band_20e936_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="recipelshbucket",
+            constraint=models.UniqueConstraint(
+                fields=("recipe", "band"), name="unique_recipe_lsh_band"
+            ),
+        ),
+        migrations.RunPython(build_minhashes, migrations.RunPython.noop),
+    ]
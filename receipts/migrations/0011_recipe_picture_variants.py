@@ -0,0 +1,17 @@
+# Generated by Django 4.2.10 on 2026-10-18 16:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("receipts", "0010_recipe_minhash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="meal_picture_variants",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 4.2.10 on 2026-10-18 17:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_postings(apps, schema_editor):
+    RecipeIngredients = apps.get_model("receipts", "RecipeIngredients")
+    IngredientPosting = apps.get_model("receipts", "IngredientPosting")
+    ingredients_by_recipe = {}
+    rows = RecipeIngredients.objects.order_by().values_list(
+        "recipe_id", "ingredient_id"
+    )
+    for recipe_id, ingredient_id in rows.iterator(chunk_size=10000):
+        ingredients_by_recipe.setdefault(recipe_id, set()).add(ingredient_id)
+    IngredientPosting.objects.bulk_create(
+        (
+            IngredientPosting(
+                ingredient_id=ingredient_id,
+                recipe_id=recipe_id,
+                required=len(ingredient_ids),
+            )
+            for recipe_id, ingredient_ids in ingredients_by_recipe.items()
+            for ingredient_id in ingredient_ids
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("receipts", "0011_recipe_picture_variants"),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name="IngredientPosting",
+        ),
+        migrations.CreateModel(
+            name="IngredientPosting",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("required", models.PositiveSmallIntegerField()),
+                (
+                    "ingredient",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="postings",
+                        to="receipts.ingredient",
+                        verbose_name="ingredient",
+                    ),
+                ),
+                (
+                    "recipe",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ingredient_postings",
+                        to="receipts.recipe",
+                        verbose_name="recipe",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="ingredientposting",
+            constraint=models.UniqueConstraint(
+                fields=("ingredient", "recipe"), name="unique_ingredient_posting"
+            ),
+        ),
+        migrations.RunPython(build_postings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 4.2.10 on 2026-10-18 17:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# receipts.feed.FANOUT_MAX_FOLLOWERS at the time of this migration.
+FANOUT_MAX_FOLLOWERS = 10000
+
+
+def create_pull_entries(apps, schema_editor):
+    Recipe = apps.get_model("receipts", "Recipe")
+    FeedPullEntry = apps.get_model("receipts", "FeedPullEntry")
+    # Recipes of chefs over the threshold were never fanned out.
+    recipes = Recipe.objects.filter(
+        author__followers_count__gte=FANOUT_MAX_FOLLOWERS
+    ).values_list("pk", "author_id", "created_at")
+    FeedPullEntry.objects.bulk_create(
+        (
+            FeedPullEntry(recipe_id=pk, author_id=author_id, created_at=created_at)
+            for pk, author_id, created_at in recipes.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("userprofile", "0004_profile_picture_variants"),
+        ("receipts", "0012_ingredient_posting_rows"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FeedPullEntry",
+            fields=[
+                (
+                    "recipe",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="feed_pull_entry",
+                        serialize=False,
+                        to="receipts.recipe",
+                        verbose_name="recipe",
+                    ),
+                ),
+                ("created_at", models.DateTimeField()),
+                (
+                    "author",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="userprofile.userprofile",
+                        verbose_name="author",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["author", "-created_at", "-recipe"],
+                        name="receipts_fe_author__d50ef7_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(create_pull_entries, migrations.RunPython.noop),
+    ]
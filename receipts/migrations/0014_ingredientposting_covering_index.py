@@ -0,0 +1,19 @@
+# Generated by Django 4.2.10 on 2026-10-18 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("receipts", "0013_feed_pull_entries"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="ingredientposting",
+            index=models.Index(
+                fields=["ingredient", "recipe", "required"],
+                name="receipts_in_ingredi_f17e53_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,232 @@
+import hashlib
+import heapq
+import random
+from array import array
+
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q
+
+from .cache import schedule_recipe_invalidation
+from .models import Recipe, RecipeIngredients, RecipeLSHBucket, RecipeMinHash
+from utils.deferred import OnCommitBatch
+
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_random = random.Random(20240719)
+_PERMUTATIONS = [
+    (_random.randrange(1, _PRIME), _random.randrange(0, _PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+]
+
+
+def signature(ingredient_ids):
+    """
+    MinHash signature of a set of ingredient ids: the minimum of each of
+    NUM_PERMUTATIONS universal hashes over the set. An empty set has no
+    signature (``None``); otherwise all such recipes would share every
+    bucket.
+    """
+    values = set(ingredient_ids)
+    if not values:
+        return None
+    return array(
+        "Q",
+        [
+            min(((a * value + b) % _PRIME) & _MAX_HASH for value in values)
+            for a, b in _PERMUTATIONS
+        ],
+    )
+
+
+def band_buckets(sig):
+    """
+    Splits the signature into BANDS bands and hashes each one to a signed
+    64-bit bucket. Two sets share a bucket in some band with probability
+    1 - (1 - J ** ROWS_PER_BAND) ** BANDS for Jaccard similarity J.
+    """
+    buckets = []
+    for band in range(BANDS):
+        rows = sig[band * ROWS_PER_BAND : (band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(rows.tobytes(), digest_size=8).digest()
+        buckets.append((band, int.from_bytes(digest, "big", signed=True)))
+    return buckets
+
+
+def estimate_similarity(first, second):
+    return sum(a == b for a, b in zip(first, second)) / NUM_PERMUTATIONS
+
+
+def jaccard(first, second):
+    first, second = set(first), set(second)
+    if not first and not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+MAX_SIMILAR_CANDIDATES = 500
+
+
+def _unpack_signature(value):
+    return array("Q", bytes(value))
+
+
+def _bucket_members(buckets):
+    """
+    Ids of the recipes in any of the ``(band, bucket)`` pairs.
+    """
+    condition = Q()
+    for band, bucket in buckets:
+        condition |= Q(band=band, bucket=bucket)
+    if not condition:
+        return set()
+    rows = RecipeLSHBucket.objects.filter(condition).values_list("recipe_id", flat=True)
+    return set(rows)
+
+
+def update_recipe_minhash(recipe_id, ingredient_ids=None):
+    """
+    Rewrites the recipe's signature and buckets. When the signature changed,
+    the cached details of the recipes sharing an old or new bucket with it
+    are invalidated, since their ingredient-based similar recipes may change.
+    """
+    if ingredient_ids is None:
+        ingredient_ids = RecipeIngredients.objects.filter(
+            recipe_id=recipe_id
+        ).values_list("ingredient_id", flat=True)
+    sig = signature(ingredient_ids)
+    with transaction.atomic():
+        previous = (
+            RecipeMinHash.objects.filter(recipe_id=recipe_id)
+            .values_list("signature", flat=True)
+            .first()
+        )
+        old_buckets = set(
+            RecipeLSHBucket.objects.filter(recipe_id=recipe_id).values_list(
+                "band", "bucket"
+            )
+        )
+        RecipeLSHBucket.objects.filter(recipe_id=recipe_id).delete()
+        if sig is None:
+            RecipeMinHash.objects.filter(recipe_id=recipe_id).delete()
+            new_buckets = set()
+        else:
+            RecipeMinHash.objects.update_or_create(
+                recipe_id=recipe_id, defaults={"signature": sig.tobytes()}
+            )
+            new_buckets = set(band_buckets(sig))
+            RecipeLSHBucket.objects.bulk_create(
+                [
+                    RecipeLSHBucket(recipe_id=recipe_id, band=band, bucket=bucket)
+                    for band, bucket in new_buckets
+                ]
+            )
+        previous = bytes(previous) if previous is not None else None
+        if previous == (sig.tobytes() if sig is not None else None):
+            return
+        affected = _bucket_members(old_buckets | new_buckets) | {recipe_id}
+        for affected_id in affected:
+            schedule_recipe_invalidation(affected_id)
+
+
+def _update_pending(pending):
+    existing = set(Recipe.objects.filter(pk__in=pending).values_list("pk", flat=True))
+    for recipe_id in existing:
+        update_recipe_minhash(recipe_id)
+
+
+schedule_recipe_minhash = OnCommitBatch(_update_pending).add
+
+
+def _changed_neighborhoods(old, new):
+    """
+    Ids of the recipes whose signature differs between ``old`` and ``new``
+    (``{recipe_id: (signature, buckets)}``) and of those sharing an old or
+    new bucket with them.
+    """
+    members = {}
+    for index in (old, new):
+        for recipe_id, (_, buckets) in index.items():
+            for bucket in buckets:
+                members.setdefault(bucket, set()).add(recipe_id)
+    affected = set()
+    for recipe_id in old.keys() | new.keys():
+        previous, previous_buckets = old.get(recipe_id, (None, ()))
+        current, current_buckets = new.get(recipe_id, (None, ()))
+        if previous == current:
+            continue
+        affected.add(recipe_id)
+        for bucket in (*previous_buckets, *current_buckets):
+            affected |= members[bucket]
+    return affected
+
+
+def rebuild_minhashes(batch_size=500):
+    # Recipes without ingredients have no signature and are not indexed.
+    ingredients_by_recipe = {}
+    rows = RecipeIngredients.objects.order_by().values_list(
+        "recipe_id", "ingredient_id"
+    )
+    for recipe_id, ingredient_id in rows.iterator(chunk_size=10000):
+        ingredients_by_recipe.setdefault(recipe_id, set()).add(ingredient_id)
+    signatures, buckets = [], []
+    new = {}
+    for recipe_id, ingredient_ids in ingredients_by_recipe.items():
+        sig = signature(ingredient_ids)
+        recipe_buckets = band_buckets(sig)
+        new[recipe_id] = (sig.tobytes(), recipe_buckets)
+        signatures.append(RecipeMinHash(recipe_id=recipe_id, signature=sig.tobytes()))
+        buckets.extend(
+            RecipeLSHBucket(recipe_id=recipe_id, band=band, bucket=bucket)
+            for band, bucket in recipe_buckets
+        )
+    with transaction.atomic():
+        old = {
+            recipe_id: (bytes(value), [])
+            for recipe_id, value in RecipeMinHash.objects.values_list(
+                "recipe_id", "signature"
+            ).iterator()
+        }
+        rows = RecipeLSHBucket.objects.values_list("recipe_id", "band", "bucket")
+        for recipe_id, band, bucket in rows.iterator(chunk_size=10000):
+            old[recipe_id][1].append((band, bucket))
+        RecipeLSHBucket.objects.all().delete()
+        RecipeMinHash.objects.all().delete()
+        RecipeMinHash.objects.bulk_create(signatures, batch_size=batch_size)
+        RecipeLSHBucket.objects.bulk_create(buckets, batch_size=batch_size)
+        for recipe_id in _changed_neighborhoods(old, new):
+            schedule_recipe_invalidation(recipe_id)
+    return len(signatures)
+
+
+def find_similar_by_ingredients(recipe_id, limit):
+    """
+    Recipe ids sharing an LSH bucket with the recipe, best estimated
+    Jaccard similarity first. At most MAX_SIMILAR_CANDIDATES candidates are
+    scored, those sharing the most bands first.
+    """
+    own = RecipeMinHash.objects.filter(recipe_id=recipe_id).first()
+    if own is None:
+        return []
+    own_buckets = RecipeLSHBucket.objects.filter(recipe_id=recipe_id)
+    candidates = (
+        RecipeLSHBucket.objects.filter(
+            Exists(own_buckets.filter(band=OuterRef("band"), bucket=OuterRef("bucket")))
+        )
+        .exclude(recipe_id=recipe_id)
+        .values("recipe_id")
+        .annotate(shared=Count("pk"))
+        .order_by("-shared", "recipe_id")
+        .values_list("recipe_id", flat=True)[:MAX_SIMILAR_CANDIDATES]
+    )
+    sig = _unpack_signature(own.signature)
+    scored = [
+        (estimate_similarity(sig, _unpack_signature(other)), -pk)
+        for pk, other in RecipeMinHash.objects.filter(
+            recipe_id__in=candidates
+        ).values_list("recipe_id", "signature")
+    ]
+    return [-pk for score, pk in heapq.nlargest(limit, scored) if score > 0]
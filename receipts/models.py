@@ -1,3 +1,4 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from autoslug import AutoSlugField
 
@@ -31,6 +32,7 @@ class Recipe(models.Model):
     meal_picture = models.ImageField(
         upload_to="cookscorner/recipe_images", max_length=500
     )
+    meal_picture_variants = models.JSONField(default=dict, blank=True)
     preparation_time = models.PositiveIntegerField(default=30)
     category = models.CharField(
         max_length=10, choices=CATEGORY_CHOICES, default="Lunch"
@@ -38,9 +40,18 @@ class Recipe(models.Model):
     slug = AutoSlugField(populate_from="name", unique=True, always_update=True)
     liked_by = models.ManyToManyField(UserProfile, related_name="likes", blank=True)
     saved_by = models.ManyToManyField(UserProfile, related_name="saves", blank=True)
+    likes_count = models.PositiveIntegerField(default=0)
+    saves_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_at", "-id"]),
+            models.Index(fields=["category", "-created_at", "-id"]),
+            models.Index(fields=["author", "-created_at", "-id"]),
+        ]
+
     def __str__(self):
         return f"{self.name}; slug: {self.slug}"
 
@@ -72,3 +83,237 @@ class RecipeIngredients(models.Model):
         return (
             f"{self.recipe.name}:{self.recipe.slug}:{self.ingredient.ingredient_name}"
         )
+
+
+class RecipeSearchDocument(models.Model):
+    recipe = models.OneToOneField(
+        Recipe,
+        verbose_name="recipe",
+        related_name="search_document",
+        primary_key=True,
+        on_delete=models.CASCADE,
+    )
+    document = SearchVectorField(null=True)
+
+    def __str__(self):
+        return f"{self.recipe_id} search document"
+
+
+class IngredientPosting(models.Model):
+    """
+    Inverted index entry: a recipe using the ingredient, with the recipe's
+    ingredient count so matches can be ranked by coverage without reading
+    RecipeIngredients. The (ingredient, recipe, required) index lets a
+    match be counted from the index alone.
+    """
+
+    ingredient = models.ForeignKey(
+        Ingredient,
+        verbose_name="ingredient",
+        related_name="postings",
+        on_delete=models.CASCADE,
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        verbose_name="recipe",
+        related_name="ingredient_postings",
+        on_delete=models.CASCADE,
+    )
+    required = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["ingredient", "recipe"], name="unique_ingredient_posting"
+            ),
+        ]
+        indexes = [models.Index(fields=["ingredient", "recipe", "required"])]
+
+    def __str__(self):
+        return f"{self.ingredient_id} posting: {self.recipe_id}"
+
+
+class FeedEntry(models.Model):
+    """
+    A recipe in a follower's precomputed timeline. ``created_at`` copies the
+    recipe's so the timeline is read with a single index range scan.
+    """
+
+    owner = models.ForeignKey(
+        UserProfile,
+        verbose_name="owner",
+        related_name="feed_entries",
+        on_delete=models.CASCADE,
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        verbose_name="recipe",
+        related_name="feed_entries",
+        on_delete=models.CASCADE,
+    )
+    author = models.ForeignKey(
+        UserProfile,
+        verbose_name="author",
+        related_name="+",
+        on_delete=models.CASCADE,
+    )
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["owner", "recipe"], name="unique_feed_entry"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["owner", "-created_at", "-recipe"]),
+            models.Index(fields=["owner", "author"]),
+        ]
+
+    def __str__(self):
+        return f"{self.owner_id}: {self.recipe_id}"
+
+
+class FeedPullEntry(models.Model):
+    """
+    A recipe posted while its author had too many followers to fan out.
+    Followers' feeds merge these on read for as long as they follow the
+    author, whatever the author's follower count is later.
+    """
+
+    recipe = models.OneToOneField(
+        Recipe,
+        verbose_name="recipe",
+        related_name="feed_pull_entry",
+        primary_key=True,
+        on_delete=models.CASCADE,
+    )
+    author = models.ForeignKey(
+        UserProfile,
+        verbose_name="author",
+        related_name="+",
+        on_delete=models.CASCADE,
+    )
+    created_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [models.Index(fields=["author", "-created_at", "-recipe"])]
+
+    def __str__(self):
+        return f"{self.author_id}: {self.recipe_id}"
+
+
+class FeedFanoutJob(models.Model):
+    recipe = models.OneToOneField(
+        Recipe,
+        verbose_name="recipe",
+        related_name="fanout_job",
+        on_delete=models.CASCADE,
+    )
+    last_follower_id = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Fan-out of {self.recipe_id} after follower {self.last_follower_id}"
+
+
+class TrendingRecipe(models.Model):
+    """
+    Time-decayed engagement score of a recipe, refreshed periodically by
+    the update_trending command. ``likes_seen``/``saves_seen`` are the
+    counters at the last refresh, so the next one only adds the delta.
+    """
+
+    recipe = models.OneToOneField(
+        Recipe,
+        verbose_name="recipe",
+        related_name="trending",
+        primary_key=True,
+        on_delete=models.CASCADE,
+    )
+    category = models.CharField(max_length=10, choices=CATEGORY_CHOICES)
+    score = models.FloatField(default=0)
+    likes_seen = models.PositiveIntegerField(default=0)
+    saves_seen = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [models.Index(fields=["category", "-score"])]
+
+    def __str__(self):
+        return f"{self.recipe_id}: {self.score}"
+
+
+class RecipeNeighbor(models.Model):
+    """
+    Precomputed "people who liked this also liked" neighbors, written by the
+    compute_similar_recipes command.
+    """
+
+    recipe = models.ForeignKey(
+        Recipe,
+        verbose_name="recipe",
+        related_name="neighbors",
+        on_delete=models.CASCADE,
+    )
+    neighbor = models.ForeignKey(
+        Recipe,
+        verbose_name="neighbor",
+        related_name="+",
+        on_delete=models.CASCADE,
+    )
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["recipe", "neighbor"], name="unique_recipe_neighbor"
+            ),
+        ]
+        indexes = [models.Index(fields=["recipe", "rank"])]
+
+    def __str__(self):
+        return f"{self.recipe_id} -> {self.neighbor_id}: {self.score}"
+
+
+class RecipeMinHash(models.Model):
+    """
+    MinHash signature of the recipe's ingredient set and its LSH bands, used
+    to find recipes with overlapping ingredients.
+    """
+
+    recipe = models.OneToOneField(
+        Recipe,
+        verbose_name="recipe",
+        related_name="minhash",
+        primary_key=True,
+        on_delete=models.CASCADE,
+    )
+    signature = models.BinaryField()
+
+    def __str__(self):
+        return f"{self.recipe_id} minhash"
+
+
+class RecipeLSHBucket(models.Model):
+    recipe = models.ForeignKey(
+        Recipe,
+        verbose_name="recipe",
+        related_name="lsh_buckets",
+        on_delete=models.CASCADE,
+    )
+    band = models.PositiveSmallIntegerField()
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["recipe", "band"], name="unique_recipe_lsh_band"
+            ),
+        ]
+        indexes = [models.Index(fields=["band", "bucket"])]
+
+    def __str__(self):
+        return f"{self.recipe_id}: {self.band}/{self.bucket}"
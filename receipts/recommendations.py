@@ -0,0 +1,129 @@
+from itertools import islice
+
+import numpy as np
+from scipy import sparse
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import schedule_recipe_invalidation
+from .models import Recipe, RecipeNeighbor
+
+NEIGHBORS_PER_RECIPE = 20
+ROW_BATCH_SIZE = 1000
+LOAD_CHUNK_SIZE = 100000
+
+
+def _stream_pairs(through, chunk_size):
+    pairs = (
+        through.objects.order_by()
+        .values_list("recipe_id", "userprofile_id")
+        .iterator(chunk_size=chunk_size)
+    )
+    while True:
+        chunk = list(islice(pairs, chunk_size))
+        if not chunk:
+            return
+        yield np.array(chunk, dtype=np.int64)
+
+
+def load_interaction_matrix(chunk_size=LOAD_CHUNK_SIZE):
+    """
+    Builds the row-normalized recipe x profile matrix of likes and saves.
+    Returns the matrix and the recipe id of each row.
+    """
+    chunks = []
+    for relation in (Recipe.liked_by, Recipe.saved_by):
+        chunks.extend(_stream_pairs(relation.through, chunk_size))
+    if not chunks:
+        return sparse.csr_matrix((0, 0)), np.array([], dtype=np.int64)
+    pairs = np.concatenate(chunks)
+    recipe_ids, rows = np.unique(pairs[:, 0], return_inverse=True)
+    profile_ids, columns = np.unique(pairs[:, 1], return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(pairs), dtype=np.float32), (rows, columns)),
+        shape=(len(recipe_ids), len(profile_ids)),
+    )
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    matrix = sparse.diags(1 / norms) @ matrix
+    return matrix.tocsr(), recipe_ids
+
+
+def top_neighbors(similarities, row_offset, k):
+    """
+    Yields ``(row, columns, scores)`` with the ``k`` most similar columns of
+    each row of the sparse ``similarities`` batch, best first, excluding the
+    row itself.
+    """
+    for index in range(similarities.shape[0]):
+        start, end = similarities.indptr[index], similarities.indptr[index + 1]
+        columns = similarities.indices[start:end]
+        scores = similarities.data[start:end]
+        keep = columns != row_offset + index
+        columns, scores = columns[keep], scores[keep]
+        if len(scores) > k:
+            best = np.argpartition(-scores, k)[:k]
+            columns, scores = columns[best], scores[best]
+        order = np.argsort(-scores, kind="stable")
+        yield row_offset + index, columns[order], scores[order]
+
+
+def _changed_recipe_ids(previous_rows, current_rows):
+    """
+    Ids of the recipes whose ranked ``(recipe_id, neighbor_id)`` lists
+    differ between the two row sets.
+    """
+    previous, current = {}, {}
+    for rows, lists in ((previous_rows, previous), (current_rows, current)):
+        for recipe_id, neighbor_id in rows:
+            lists.setdefault(recipe_id, []).append(neighbor_id)
+    return {
+        recipe_id
+        for recipe_id in previous.keys() | current.keys()
+        if previous.get(recipe_id) != current.get(recipe_id)
+    }
+
+
+def compute_similar_recipes(
+    k=NEIGHBORS_PER_RECIPE, batch_size=ROW_BATCH_SIZE, chunk_size=LOAD_CHUNK_SIZE
+):
+    """
+    Recomputes the top ``k`` cosine-similar recipes of every recipe with
+    likes or saves, ``batch_size`` rows at a time. The cached details of
+    recipes whose neighbors changed are invalidated.
+    """
+    started = timezone.now()
+    matrix, recipe_ids = load_interaction_matrix(chunk_size)
+    transposed = matrix.T.tocsr()
+    for offset in range(0, matrix.shape[0], batch_size):
+        similarities = (matrix[offset : offset + batch_size] @ transposed).tocsr()
+        neighbors = []
+        batch_recipe_ids = []
+        for row, columns, scores in top_neighbors(similarities, offset, k):
+            batch_recipe_ids.append(int(recipe_ids[row]))
+            neighbors.extend(
+                RecipeNeighbor(
+                    recipe_id=int(recipe_ids[row]),
+                    neighbor_id=int(recipe_ids[column]),
+                    score=float(score),
+                    rank=rank,
+                    computed_at=started,
+                )
+                for rank, (column, score) in enumerate(zip(columns, scores), 1)
+            )
+        with transaction.atomic():
+            previous = RecipeNeighbor.objects.filter(recipe_id__in=batch_recipe_ids)
+            changed = _changed_recipe_ids(
+                previous.order_by("rank").values_list("recipe_id", "neighbor_id"),
+                [(neighbor.recipe_id, neighbor.neighbor_id) for neighbor in neighbors],
+            )
+            previous.delete()
+            RecipeNeighbor.objects.bulk_create(neighbors, batch_size=1000)
+            for recipe_id in changed:
+                schedule_recipe_invalidation(recipe_id)
+    with transaction.atomic():
+        stale = RecipeNeighbor.objects.filter(computed_at__lt=started)
+        stale_recipe_ids = set(stale.values_list("recipe_id", flat=True))
+        stale.delete()
+        for recipe_id in stale_recipe_ids:
+            schedule_recipe_invalidation(recipe_id)
+    return matrix.shape[0]
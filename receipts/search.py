@@ -0,0 +1,169 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F, FloatField
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+
+from .models import Ingredient, Recipe, RecipeIngredients, RecipeSearchDocument
+from utils.deferred import OnCommitBatch
+
+SEARCH_CONFIG = "russian"
+SEARCH_ORDERING = ("-rank", "-id")
+
+_TOKEN_RE = re.compile(r"\w+")
+
+RECIPE_TABLE = Recipe._meta.db_table
+RECIPE_INGREDIENTS_TABLE = RecipeIngredients._meta.db_table
+INGREDIENT_TABLE = Ingredient._meta.db_table
+
+
+def _tokens(term):
+    return _TOKEN_RE.findall(term.lower())
+
+
+class PostgresRecipeSearch:
+    """
+    Weighted tsvector (name A, ingredients B, description C) kept in
+    RecipeSearchDocument under a GIN index.
+    """
+
+    table = RecipeSearchDocument._meta.db_table
+    index_name = "receipts_recipesearchdocument_gin"
+
+    def install(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.index_name} "
+                f"ON {self.table} USING gin (document)"
+            )
+
+    def uninstall(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP INDEX IF EXISTS {self.index_name}")
+
+    def index(self, recipe_ids=None):
+        where, params = "", [SEARCH_CONFIG] * 3
+        if recipe_ids is not None:
+            where, params = "WHERE r.id = ANY(%s)", params + [list(recipe_ids)]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {self.table} (recipe_id, document)
+                SELECT r.id,
+                    setweight(to_tsvector(%s::regconfig, r.name), 'A')
+                    || setweight(to_tsvector(%s::regconfig,
+                        coalesce(string_agg(i.ingredient_name, ' '), '')), 'B')
+                    || setweight(to_tsvector(%s::regconfig, r.description), 'C')
+                FROM {RECIPE_TABLE} r
+                LEFT JOIN {RECIPE_INGREDIENTS_TABLE} ri ON ri.recipe_id = r.id
+                LEFT JOIN {INGREDIENT_TABLE} i ON i.id = ri.ingredient_id
+                {where}
+                GROUP BY r.id
+                ON CONFLICT (recipe_id) DO UPDATE SET document = EXCLUDED.document
+                """,
+                params,
+            )
+
+    def search(self, queryset, tokens):
+        query = SearchQuery(
+            " & ".join(f"{token}:*" for token in tokens),
+            config=SEARCH_CONFIG,
+            search_type="raw",
+        )
+        document = F("search_document__document")
+        return queryset.filter(search_document__document=query).annotate(
+            rank=Cast(SearchRank(document, query), FloatField())
+        )
+
+
+class SQLiteRecipeSearch:
+    """
+    FTS5 equivalent of PostgresRecipeSearch for local SQLite databases.
+    The virtual table's rowid is the recipe id.
+    """
+
+    table = "receipts_recipe_fts"
+
+    def install(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} "
+                "USING fts5(name, ingredients, description, "
+                "tokenize='unicode61 remove_diacritics 2')"
+            )
+
+    def uninstall(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+    def index(self, recipe_ids=None):
+        where, params = "", []
+        if recipe_ids is not None:
+            recipe_ids = list(recipe_ids)
+            placeholders = ", ".join(["%s"] * len(recipe_ids))
+            where, params = f"WHERE r.id IN ({placeholders})", recipe_ids
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {self.table} {where.replace('r.id', 'rowid')}", params
+            )
+            cursor.execute(
+                f"""
+                INSERT INTO {self.table} (rowid, name, ingredients, description)
+                SELECT r.id, r.name,
+                    coalesce(group_concat(i.ingredient_name, ' '), ''),
+                    r.description
+                FROM {RECIPE_TABLE} r
+                LEFT JOIN {RECIPE_INGREDIENTS_TABLE} ri ON ri.recipe_id = r.id
+                LEFT JOIN {INGREDIENT_TABLE} i ON i.id = ri.ingredient_id
+                {where}
+                GROUP BY r.id
+                """,
+                params,
+            )
+
+    def search(self, queryset, tokens):
+        # Each token is a quoted string (quotes doubled) so FTS5 operators
+        # and column filters in the input are matched as plain text.
+        match = " ".join('"%s"*' % token.replace('"', '""') for token in tokens)
+        matches = RawSQL(
+            f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s", (match,)
+        )
+        # bm25() is lower-is-better, negate it so both engines sort by -rank.
+        rank = RawSQL(
+            f"SELECT -bm25({self.table}, 10.0, 5.0, 1.0) FROM {self.table} "
+            f"WHERE {self.table} MATCH %s AND rowid = {RECIPE_TABLE}.id",
+            (match,),
+            output_field=FloatField(),
+        )
+        return queryset.filter(id__in=matches).annotate(rank=rank)
+
+
+ENGINES = {
+    "postgresql": PostgresRecipeSearch,
+    "sqlite": SQLiteRecipeSearch,
+}
+
+
+def get_search_engine():
+    return ENGINES[connection.vendor]()
+
+
+def search_recipes(queryset, term):
+    """
+    Returns the matching recipes annotated with ``rank`` and the ordering to
+    paginate them with. An empty term leaves the queryset untouched.
+    """
+    tokens = _tokens(term or "")
+    if not tokens:
+        return queryset, None
+    return get_search_engine().search(queryset, tokens), SEARCH_ORDERING
+
+
+def _index_pending(pending):
+    get_search_engine().index(pending)
+
+
+# Several changes to one recipe inside a transaction share one reindex.
+schedule_recipe_index = OnCommitBatch(_index_pending).add
@@ -1,5 +1,8 @@
 from rest_framework import serializers
 
+from utils.images import card_url, variant_urls
+from utils.uploads import resolve_upload_key
+
 from .models import Recipe, Ingredient, RecipeIngredients
 
 
@@ -22,7 +25,22 @@ class RecipeIngredientsSerializer(serializers.ModelSerializer):
         }
 
 
+class SimilarRecipeSerializer(serializers.ModelSerializer):
+    meal_picture = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Recipe
+        fields = ["name", "slug", "meal_picture"]
+
+    def get_meal_picture(self, instance):
+        return card_url(instance.meal_picture_variants, instance.meal_picture)
+
+
 class RecipeCreateSerializer(serializers.ModelSerializer):
+    # Key of a picture uploaded with a ticket from the upload-ticket
+    # endpoint; the multipart meal_picture is still accepted.
+    meal_picture_key = serializers.CharField(write_only=True, required=False)
+
     class Meta:
         model = Recipe
         fields = [
@@ -31,16 +49,44 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             "description",
             "difficulty",
             "meal_picture",
+            "meal_picture_key",
             "preparation_time",
             "category",
             "slug",
         ]
+        extra_kwargs = {"meal_picture": {"required": False}}
+
+    def validate(self, attrs):
+        key = attrs.pop("meal_picture_key", None)
+        if key:
+            upload_to = Recipe._meta.get_field("meal_picture").upload_to
+            attrs["meal_picture"] = resolve_upload_key(
+                key, upload_to, attrs["author"].user
+            )
+        if not attrs.get("meal_picture"):
+            raise serializers.ValidationError(
+                {"meal_picture": "Upload a picture or pass meal_picture_key."}
+            )
+        return attrs
+
+
+DETAIL_ONLY_FIELDS = (
+    "description",
+    "difficulty",
+    "preparation_time",
+    "ingredients",
+    "author_slug",
+    "similar",
+)
 
 
 class RecipeSerializer(serializers.ModelSerializer):
     author_name = serializers.ReadOnlyField(source="author.username")
     author_slug = serializers.ReadOnlyField(source="author.slug")
     ingredients = RecipeIngredientsSerializer(many=True)
+    similar = SimilarRecipeSerializer(
+        source="similar_recipes", many=True, read_only=True
+    )
 
     class Meta:
         model = Recipe
@@ -54,19 +100,27 @@ class RecipeSerializer(serializers.ModelSerializer):
             "meal_picture",
             "preparation_time",
             "ingredients",
+            "similar",
         ]
 
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self.context["detail"]:
+            for name in DETAIL_ONLY_FIELDS:
+                fields.pop(name)
+        return fields
+
     def to_representation(self, instance):
         representation = super().to_representation(instance)
-        user = self.context["request"].user
-        representation["likes"] = instance.liked_by.count()
-        representation["saves"] = instance.saved_by.count()
-        representation["is_liked"] = instance.liked_by.filter(user=user).exists()
-        representation["is_saved"] = instance.saved_by.filter(user=user).exists()
-        if not self.context["detail"]:
-            representation.pop("description")
-            representation.pop("difficulty")
-            representation.pop("preparation_time")
-            representation.pop("ingredients")
-            representation.pop("author_slug")
+        representation["likes"] = instance.likes_count
+        representation["saves"] = instance.saves_count
+        if self.context["detail"]:
+            representation["meal_picture_variants"] = variant_urls(
+                instance.meal_picture_variants, instance.meal_picture.name
+            )
+        else:
+            # Lists only need the card-sized picture.
+            representation["meal_picture"] = card_url(
+                instance.meal_picture_variants, instance.meal_picture
+            )
         return representation
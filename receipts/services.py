@@ -1,22 +1,257 @@
 import json
 
-from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import (
+    Count,
+    Exists,
+    F,
+    IntegerField,
+    OuterRef,
+    Prefetch,
+    Subquery,
+    Value,
+)
+from django.db.models.functions import Coalesce, Now
 
+from .cache import (
+    get_cached_recipe_cards,
+    get_cached_recipe_detail,
+    get_ingredient_ids,
+    get_recipe_card_versions,
+    get_recipe_version,
+    schedule_recipe_invalidation,
+)
+from .feed import enqueue_fanout
+from .ingredient_index import schedule_recipe_postings
+from .minhash import find_similar_by_ingredients, schedule_recipe_minhash
+from .search import schedule_recipe_index
 from .serializers import RecipeSerializer, RecipeCreateSerializer
-from .models import Ingredient, RecipeIngredients, Recipe
+from .models import Ingredient, RecipeIngredients, Recipe, RecipeNeighbor
+from utils.conditional import make_etag
+from utils.pagination import paginate
+from utils.relations import add_relation, remove_relation
 
+RECIPE_ORDERING = ("-created_at", "-id")
+SIMILAR_RECIPES_LIMIT = 6
 
-def get_paginated_data(queryset, request):
-    page_number = int(request.query_params.get("page", 1))
-    page_limit = int(request.query_params.get("limit", 10))
-    paginator = Paginator(queryset, page_limit)
-    serializer = RecipeSerializer(
-        paginator.page(page_number),
-        many=True,
-        context={"request": request, "detail": False},
+
+def _relation_count(through):
+    counts = (
+        through.objects.filter(recipe=OuterRef("pk"))
+        .order_by()
+        .values("recipe")
+        .annotate(total=Count("pk"))
+        .values("total")
     )
-    data = {"data": serializer.data, "total": paginator.num_pages}
-    return data
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+RECIPE_COUNTERS = {"liked_by": "likes_count", "saved_by": "saves_count"}
+
+
+def set_recipe_relation(recipe_id, profile_id, relation, value):
+    """
+    Idempotently adds (``value`` true) or removes the profile from the
+    recipe's ``relation`` and moves the matching counter only when the
+    membership actually changed. Returns whether it changed.
+    """
+    field = Recipe._meta.get_field(relation)
+    counter = RECIPE_COUNTERS[relation]
+    with transaction.atomic():
+        if value:
+            changed = add_relation(field, recipe_id, profile_id)
+            delta = 1
+        else:
+            changed = remove_relation(field, recipe_id, profile_id)
+            delta = -1
+        if changed:
+            Recipe.objects.filter(pk=recipe_id).update(
+                **{counter: F(counter) + delta}, updated_at=Now()
+            )
+            schedule_recipe_invalidation(recipe_id)
+    return changed
+
+
+def recount_recipe_counters(recipe_ids):
+    actual = {
+        counter: _relation_count(getattr(Recipe, relation).through)
+        for relation, counter in RECIPE_COUNTERS.items()
+    }
+    drifted = (
+        Recipe.objects.filter(pk__in=recipe_ids)
+        .annotate(**{f"actual_{counter}": value for counter, value in actual.items()})
+        .exclude(
+            likes_count=F("actual_likes_count"),
+            saves_count=F("actual_saves_count"),
+        )
+        .values_list("pk", flat=True)
+    )
+    drifted = list(drifted)
+    if drifted:
+        Recipe.objects.filter(pk__in=drifted).update(**actual, updated_at=Now())
+        for recipe_id in drifted:
+            schedule_recipe_invalidation(recipe_id)
+    return drifted
+
+
+def get_recipe_detail(slug):
+    ingredients = RecipeIngredients.objects.select_related("ingredient")
+    neighbors = RecipeNeighbor.objects.filter(rank__lte=SIMILAR_RECIPES_LIMIT)
+    queryset = Recipe.objects.select_related("author").prefetch_related(
+        Prefetch("ingredients", queryset=ingredients),
+        Prefetch(
+            "neighbors",
+            queryset=neighbors.select_related("neighbor").order_by("rank"),
+        ),
+    )
+    recipe = queryset.get(slug=slug)
+    recipe.similar_recipes = [
+        neighbor.neighbor for neighbor in recipe.neighbors.all()
+    ] or get_similar_by_ingredients(recipe.pk)
+    return recipe
+
+
+def _relation_exists(relation, user):
+    through = getattr(Recipe, relation).through
+    return Exists(through.objects.filter(recipe=OuterRef("pk"), userprofile__user=user))
+
+
+def get_viewer_recipe_ids(recipe_ids, user):
+    """
+    Ids of the given recipes that the user liked and saved, read in one
+    query.
+    """
+    if not recipe_ids:
+        return set(), set()
+    relations = [
+        getattr(Recipe, relation)
+        .through.objects.filter(recipe_id__in=recipe_ids, userprofile__user=user)
+        .annotate(relation=Value(relation))
+        .values_list("recipe_id", "relation")
+        for relation in RECIPE_COUNTERS
+    ]
+    rows = relations[0].union(*relations[1:], all=True)
+    liked, saved = set(), set()
+    for recipe_id, relation in rows:
+        (liked if relation == "liked_by" else saved).add(recipe_id)
+    return liked, saved
+
+
+def _with_viewer_flags(data, recipe_id, liked, saved):
+    return {**data, "is_liked": recipe_id in liked, "is_saved": recipe_id in saved}
+
+
+def prepare_recipe_detail_data(slug, request):
+    """
+    Returns ``(build, validators)`` for the recipe detail. The ETag comes
+    from the recipe's cache version, which also moves on changes that leave
+    ``updated_at`` alone (author renames, ingredient edits), so there is no
+    Last-Modified; ``build()`` returns the payload, whose user-independent
+    part is cached per version.
+    """
+    recipe = (
+        Recipe.objects.only("pk")
+        .annotate(
+            is_liked=_relation_exists("liked_by", request.user),
+            is_saved=_relation_exists("saved_by", request.user),
+        )
+        .get(slug=slug)
+    )
+    flags = {"is_liked": recipe.is_liked, "is_saved": recipe.is_saved}
+    version = get_recipe_version(slug)
+    etag = make_etag("recipe", recipe.pk, version, flags)
+
+    def compute():
+        serializer = RecipeSerializer(
+            get_recipe_detail(slug), context={"request": request, "detail": True}
+        )
+        return serializer.data
+
+    def build():
+        return {**get_cached_recipe_detail(slug, compute, version), **flags}
+
+    return build, {"etag": etag}
+
+
+def get_similar_by_ingredients(recipe_id):
+    recipe_ids = find_similar_by_ingredients(recipe_id, SIMILAR_RECIPES_LIMIT)
+    recipes = Recipe.objects.in_bulk(recipe_ids)
+    return [recipes[pk] for pk in recipe_ids if pk in recipes]
+
+
+def get_recipe_cards(recipe_ids, request, liked, saved, extra=None, versions=None):
+    """
+    List representations of the recipes in ``recipe_ids`` order: shared card
+    payloads from the cache (only misses hit the database) with the
+    viewer's flags and the optional per-recipe ``extra`` laid over them.
+    """
+
+    def compute(missing_ids):
+        recipes = Recipe.objects.filter(pk__in=missing_ids).select_related("author")
+        serializer = RecipeSerializer(
+            recipes, many=True, context={"request": request, "detail": False}
+        )
+        return {recipe.pk: data for recipe, data in zip(recipes, serializer.data)}
+
+    cards = get_cached_recipe_cards(recipe_ids, compute, versions)
+    extra = extra or {}
+    return [
+        {**_with_viewer_flags(cards[pk], pk, liked, saved), **extra.get(pk, {})}
+        for pk in recipe_ids
+        if pk in cards
+    ]
+
+
+CARD_VALIDATOR_FIELDS = ("updated_at", "likes_count", "saves_count")
+
+
+def _prepare_cards(recipes, request, meta, extra=None):
+    recipe_ids = [recipe.pk for recipe in recipes]
+    liked, saved = get_viewer_recipe_ids(recipe_ids, request.user)
+    # The card versions also move on changes that leave the row alone,
+    # such as the author renaming their profile.
+    versions = get_recipe_card_versions(recipe_ids)
+    state = [
+        [
+            recipe.pk,
+            versions[recipe.pk],
+            *(getattr(recipe, field) for field in CARD_VALIDATOR_FIELDS),
+        ]
+        for recipe in recipes
+    ]
+    etag = make_etag("cards", state, sorted(liked), sorted(saved), meta, extra)
+
+    def build():
+        data = get_recipe_cards(recipe_ids, request, liked, saved, extra, versions)
+        return {"data": data, **meta}
+
+    return build, {"etag": etag}
+
+
+def prepare_ranked_recipes_data(recipe_ids, request, extra=None, meta=None):
+    """
+    Returns ``(build, validators)`` for recipes in the given order.
+    """
+    recipes = Recipe.objects.filter(pk__in=recipe_ids).only(*CARD_VALIDATOR_FIELDS)
+    recipes = {recipe.pk: recipe for recipe in recipes}
+    ordered = [recipes[pk] for pk in recipe_ids if pk in recipes]
+    return _prepare_cards(ordered, request, meta or {}, extra)
+
+
+def _ordering_fields(ordering):
+    names = {field.name for field in Recipe._meta.concrete_fields}
+    return [field.lstrip("-") for field in ordering if field.lstrip("-") in names]
+
+
+def prepare_paginated_data(queryset, request, ordering=None):
+    """
+    Returns ``(build, validators)`` for a page of ``queryset``. Only the
+    columns needed for ordering and validation are read up front.
+    """
+    ordering = ordering or RECIPE_ORDERING
+    fields = {*_ordering_fields(ordering), *CARD_VALIDATOR_FIELDS}
+    recipes, meta = paginate(queryset.only(*fields), request, ordering)
+    return _prepare_cards(recipes, request, meta)
 
 
 def _convert_ingredients_to_json(data):
@@ -35,16 +270,41 @@ def create_recipe(data):
 
 
 def create_recipe_ingredinets_relation(recipe, ingredients):
-    result = []
     ingredients = _convert_ingredients_to_json(ingredients)
-    for ingredient in ingredients:
-        ingred = Ingredient.objects.get_or_create(
-            ingredient_name=ingredient["ingredient_name"]
+    names = {ingredient["ingredient_name"] for ingredient in ingredients}
+    ingredient_ids = get_ingredient_ids(names)
+    missing = names - ingredient_ids.keys()
+    if missing:
+        # ignore_conflicts lets a concurrent creator of the same name win.
+        Ingredient.objects.bulk_create(
+            [Ingredient(ingredient_name=name) for name in missing],
+            ignore_conflicts=True,
         )
-        amount = ingredient["amount"]
-        unit = ingredient["unit"]
-        relation = RecipeIngredients.objects.create(
-            recipe=recipe, ingredient=ingred[0], amount=amount, unit=unit
+        ingredient_ids.update(
+            Ingredient.objects.filter(ingredient_name__in=missing).values_list(
+                "ingredient_name", "id"
+            )
         )
-        result.append(relation)
+    result = RecipeIngredients.objects.bulk_create(
+        [
+            RecipeIngredients(
+                recipe=recipe,
+                ingredient_id=ingredient_ids[ingredient["ingredient_name"]],
+                amount=ingredient["amount"],
+                unit=ingredient["unit"],
+            )
+            for ingredient in ingredients
+        ]
+    )
+    schedule_recipe_index(recipe.pk)
+    schedule_recipe_postings(recipe.pk)
+    schedule_recipe_minhash(recipe.pk)
     return result
+
+
+@transaction.atomic
+def create_recipe_with_ingredients(data, ingredients):
+    recipe = create_recipe(data=data)
+    create_recipe_ingredinets_relation(recipe=recipe, ingredients=ingredients)
+    enqueue_fanout(recipe)
+    return recipe
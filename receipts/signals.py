@@ -0,0 +1,109 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Ingredient, Recipe, RecipeIngredients
+from utils.local_cache import publish_invalidation
+from userprofile.cache import schedule_profile_invalidation
+from userprofile.models import UserProfile
+from userprofile.signals import following_changed
+from .cache import schedule_recipe_invalidation
+from .feed import update_feed_on_follow
+from .images import IMAGE_VARIANT_SPECS
+from .ingredient_index import schedule_recipe_postings
+from .minhash import schedule_recipe_minhash
+from .search import schedule_recipe_index
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def reindex_recipe(sender, instance, **kwargs):
+    schedule_recipe_index(instance.pk)
+    schedule_recipe_invalidation(instance.pk, instance.slug)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def invalidate_author_profile(sender, instance, created=True, **kwargs):
+    # The profile shows the number of recipes.
+    if created:
+        schedule_profile_invalidation(instance.author_id)
+
+
+@receiver(pre_save, sender=Recipe)
+def invalidate_previous_slug(sender, instance, **kwargs):
+    # The slug follows the name and is regenerated during save, so this is
+    # still the slug the cached detail was stored under.
+    if instance.pk is not None:
+        schedule_recipe_invalidation(instance.pk, instance.slug)
+
+
+@receiver(post_save, sender=RecipeIngredients)
+def reindex_saved_recipe_ingredient(sender, instance, **kwargs):
+    schedule_recipe_index(instance.recipe_id)
+    schedule_recipe_postings(instance.recipe_id)
+    schedule_recipe_minhash(instance.recipe_id)
+    schedule_recipe_invalidation(instance.recipe_id)
+
+
+@receiver(post_delete, sender=RecipeIngredients)
+def reindex_deleted_recipe_ingredient(sender, instance, **kwargs):
+    schedule_recipe_index(instance.recipe_id)
+    schedule_recipe_postings(instance.recipe_id)
+    schedule_recipe_minhash(instance.recipe_id)
+    schedule_recipe_invalidation(instance.recipe_id)
+
+
+@receiver(post_save, sender=Ingredient)
+def reindex_ingredient_recipes(sender, instance, created, **kwargs):
+    if created:
+        return
+    recipe_ids = RecipeIngredients.objects.filter(ingredient=instance).values_list(
+        "recipe_id", flat=True
+    )
+    for recipe_id in recipe_ids:
+        schedule_recipe_index(recipe_id)
+        schedule_recipe_invalidation(recipe_id)
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredient_ids(sender, instance, created=False, **kwargs):
+    # New names are never cached, so only renames and deletions matter.
+    if not created:
+        publish_invalidation("ingredient_ids")
+
+
+@receiver(m2m_changed, sender=Recipe.liked_by.through)
+@receiver(m2m_changed, sender=Recipe.saved_by.through)
+def invalidate_recipe_relation(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        schedule_recipe_invalidation(instance.pk, instance.slug)
+        return
+    if action == "pre_clear":
+        pk_set = sender.objects.filter(userprofile=instance).values_list(
+            "recipe_id", flat=True
+        )
+    for recipe_id in pk_set:
+        schedule_recipe_invalidation(recipe_id)
+
+
+@receiver(post_save, sender=UserProfile)
+def invalidate_author_recipes(sender, instance, created, **kwargs):
+    if created:
+        return
+    recipe_ids = Recipe.objects.filter(author=instance).values_list("pk", flat=True)
+    for recipe_id in recipe_ids:
+        schedule_recipe_invalidation(recipe_id)
+
+
+@receiver(following_changed)
+def update_follower_feed(sender, profile_id, target_id, value, **kwargs):
+    update_feed_on_follow(profile_id, target_id, value)
+
+
+for spec in IMAGE_VARIANT_SPECS:
+    # Admin edits and upload keys replace images too, not only the API.
+    pre_save.connect(spec.reset_replaced, sender=spec.model)
+    post_save.connect(spec.save_reset, sender=spec.model)
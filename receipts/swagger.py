@@ -15,6 +15,7 @@ class RecipeCreateSerializer(serializers.Serializer):
     name = serializers.CharField()
     category = serializers.CharField()
     meal_picture = serializers.ImageField()
+    meal_picture_key = serializers.CharField()
     description = serializers.CharField()
     difficulty = serializers.CharField()
     preparation_time = serializers.IntegerField()
@@ -38,12 +39,32 @@ class RecipeListSerializer(serializers.Serializer):
         abstract = True
 
 
+class RecipeByIngredientsSerializer(RecipeListSerializer):
+    matched = serializers.IntegerField()
+    required = serializers.IntegerField()
+    missing = serializers.IntegerField()
+    coverage = serializers.FloatField()
+
+
+class SimilarRecipeSerializer(serializers.Serializer):
+    name = serializers.CharField()
+    slug = serializers.SlugField()
+    meal_picture = serializers.ImageField()
+
+    class Meta:
+        abstract = True
+
+
 class RecipeDetailSerializer(RecipeListSerializer):
     author_slug = serializers.SlugField()
     description = serializers.CharField()
     difficulty = serializers.CharField()
     preparation_time = serializers.IntegerField()
     ingredients = IngredientsSerializer(many=True)
+    similar = SimilarRecipeSerializer(many=True)
+    meal_picture_variants = serializers.DictField(
+        child=serializers.DictField(child=serializers.URLField())
+    )
 
 
 recipe_detail_swagger = {
@@ -75,9 +96,16 @@ recipe_by_category_swagger = {
         openapi.Parameter(
             "limit",
             openapi.IN_QUERY,
-            description="Pagination limit. Default: 10.",
+            description="Pagination limit. Default: 10, maximum: 50.",
             type=openapi.TYPE_INTEGER,
         ),
+        openapi.Parameter(
+            "cursor",
+            openapi.IN_QUERY,
+            description="Cursor pagination. Pass an empty value for the first "
+            "page, then the returned next/prev cursor. Replaces page and total.",
+            type=openapi.TYPE_STRING,
+        ),
     ],
     "request_body": None,
     "response": RecipeListSerializer,
@@ -88,10 +116,68 @@ search_recipe_swagger = {
         openapi.Parameter(
             "search",
             openapi.IN_QUERY,
-            description="Search recipes by name.",
+            description="Search recipes by name, description and ingredients.",
+            type=openapi.TYPE_STRING,
+            required=True,
+        ),
+    ],
+    "request_body": None,
+    "response": RecipeListSerializer,
+}
+
+recipes_by_ingredients_swagger = {
+    "parameters": [
+        openapi.Parameter(
+            "ingredients",
+            openapi.IN_QUERY,
+            description="Ingredient names, comma separated or repeated.",
             type=openapi.TYPE_STRING,
             required=True,
         ),
+        openapi.Parameter(
+            "limit",
+            openapi.IN_QUERY,
+            description="Number of recipes. Default: 10, maximum: 50.",
+            type=openapi.TYPE_INTEGER,
+        ),
+    ],
+    "request_body": None,
+    "response": RecipeByIngredientsSerializer,
+}
+
+feed_swagger = {
+    "parameters": [
+        openapi.Parameter(
+            "cursor",
+            openapi.IN_QUERY,
+            description="Cursor of the next page returned by the previous request.",
+            type=openapi.TYPE_STRING,
+        ),
+        openapi.Parameter(
+            "limit",
+            openapi.IN_QUERY,
+            description="Pagination limit. Default: 10, maximum: 50.",
+            type=openapi.TYPE_INTEGER,
+        ),
+    ],
+    "request_body": None,
+    "response": RecipeListSerializer,
+}
+
+trending_swagger = {
+    "parameters": [
+        openapi.Parameter(
+            "category",
+            openapi.IN_QUERY,
+            description="Recipe category. Default: Breakfast.",
+            type=openapi.TYPE_STRING,
+        ),
+        openapi.Parameter(
+            "limit",
+            openapi.IN_QUERY,
+            description="Number of recipes. Default: 10, maximum: 50.",
+            type=openapi.TYPE_INTEGER,
+        ),
     ],
     "request_body": None,
     "response": RecipeListSerializer,
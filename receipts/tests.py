@@ -1,3 +1,1143 @@
-from django.test import TestCase
+import base64
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import StopUpload
+from django.http import HttpRequest
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from users.models import User
+from utils.images import process_pending_images
+from utils.uploads import ImageUploadHandler
+from utils.cache import get_cache_stats
+from utils.local_cache import LocalCache, clear_local_caches, publish_invalidation
+from userprofile.models import UserProfile
+from userprofile.services import set_following
+
+from .ingredient_index import find_recipes_by_ingredients, rebuild_postings
+from .feed import enqueue_fanout, process_fanout_batch
+from .trending import get_trending_recipe_ids, update_trending_scores
+from .recommendations import compute_similar_recipes
+from .search import SQLiteRecipeSearch
+from .minhash import find_similar_by_ingredients, rebuild_minhashes, signature
+from .models import (
+    FeedEntry,
+    Ingredient,
+    IngredientPosting,
+    Recipe,
+    RecipeIngredients,
+    RecipeLSHBucket,
+    RecipeMinHash,
+    RecipeNeighbor,
+    TrendingRecipe,
+)
+from .cache import (
+    get_cached_recipe_cards,
+    get_cached_recipe_detail,
+    schedule_recipe_invalidation,
+)
+from .images import IMAGE_VARIANT_SPECS
+from .services import get_recipe_detail, set_recipe_relation
+
+
+def create_recipe_with_ingredients(author, name, ingredients_count):
+    recipe = Recipe.objects.create(
+        author=author,
+        name=name,
+        description="Description",
+        meal_picture="cookscorner/recipe_images/meal.jpeg",
+    )
+    for index in range(ingredients_count):
+        ingredient, _ = Ingredient.objects.get_or_create(
+            ingredient_name=f"Ingredient {index}"
+        )
+        RecipeIngredients.objects.create(
+            recipe=recipe, ingredient=ingredient, amount="1", unit="kg"
+        )
+    return recipe
+
+
+class RecipeDetailQueriesTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_local_caches()
+        user = User.objects.create_user(email="chef@example.com", password="Chef123!")
+        self.profile = UserProfile.objects.create(user=user, username="Chef")
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def assertDetailQueries(self, recipe, num):
+        url = reverse("cookscorner-recipe-detail", kwargs={"slug": recipe.slug})
+        with self.assertNumQueries(num):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_query_count_does_not_depend_on_ingredients(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            small = create_recipe_with_ingredients(self.profile, "Small", 2)
+            large = create_recipe_with_ingredients(self.profile, "Large", 30)
+        set_recipe_relation(large.pk, self.profile.pk, "liked_by", True)
+
+        self.assertDetailQueries(small, 6)
+        response = self.assertDetailQueries(large, 6)
+        self.assertEqual(len(response.data["ingredients"]), 30)
+        self.assertEqual(response.data["likes"], 1)
+        self.assertTrue(response.data["is_liked"])
+
+    def test_cached_detail_is_invalidated_on_change(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe = create_recipe_with_ingredients(self.profile, "Cached", 3)
+        self.assertDetailQueries(recipe, 6)
+        response = self.assertDetailQueries(recipe, 1)
+        self.assertFalse(response.data["is_liked"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            set_recipe_relation(recipe.pk, self.profile.pk, "liked_by", True)
+        response = self.assertDetailQueries(recipe, 6)
+        self.assertEqual(response.data["likes"], 1)
+        self.assertTrue(response.data["is_liked"])
+
+    def test_unchanged_detail_is_not_modified(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe = create_recipe_with_ingredients(self.profile, "Etag", 3)
+        response = self.assertDetailQueries(recipe, 6)
+        url = reverse("cookscorner-recipe-detail", kwargs={"slug": recipe.slug})
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            set_recipe_relation(recipe.pk, self.profile.pk, "saved_by", True)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data["is_saved"])
+
+    def test_detail_is_validated_by_version_only(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe = create_recipe_with_ingredients(self.profile, "Renamed", 1)
+        url = reverse("cookscorner-recipe-detail", kwargs={"slug": recipe.slug})
+        response = self.client.get(url)
+        self.assertNotIn("Last-Modified", response)
+
+        # Renaming the author leaves the recipe's updated_at alone.
+        self.profile.username = "New Chef"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.save()
+        response = self.client.get(
+            url,
+            HTTP_IF_NONE_MATCH=response["ETag"],
+            HTTP_IF_MODIFIED_SINCE="Fri, 01 Jan 2100 00:00:00 GMT",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["author_name"], "New Chef")
+
+
+class RecipeCountersTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_local_caches()
+        self.profiles = []
+        for index in range(2):
+            user = User.objects.create_user(
+                email=f"counter{index}@example.com", password="Counter123!"
+            )
+            self.profiles.append(
+                UserProfile.objects.create(user=user, username=f"Counter {index}")
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.profiles[0].user)
+
+    def test_reconcile_fixes_drifted_counters(self):
+        drifted = create_recipe_with_ingredients(self.profiles[0], "Drifted", 1)
+        intact = create_recipe_with_ingredients(self.profiles[0], "Intact", 1)
+        for profile in self.profiles:
+            set_recipe_relation(drifted.pk, profile.pk, "liked_by", True)
+        set_recipe_relation(drifted.pk, self.profiles[1].pk, "saved_by", True)
+        set_recipe_relation(intact.pk, self.profiles[1].pk, "liked_by", True)
+        Recipe.objects.filter(pk=drifted.pk).update(likes_count=7, saves_count=0)
+        url = reverse("cookscorner-recipe-detail", kwargs={"slug": drifted.slug})
+        self.assertEqual(self.client.get(url).data["likes"], 7)
+
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("reconcile_recipe_counters", chunk_size=1, stdout=out)
+        self.assertIn("Fixed counters on 1 recipes.", out.getvalue())
+        for recipe in Recipe.objects.filter(pk__in=[drifted.pk, intact.pk]):
+            self.assertEqual(recipe.likes_count, recipe.liked_by.count())
+            self.assertEqual(recipe.saves_count, recipe.saved_by.count())
+        response = self.client.get(url)
+        self.assertEqual(response.data["likes"], 2)
+        self.assertEqual(response.data["saves"], 1)
+
+
+class RecipeCardsCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_local_caches()
+        user = User.objects.create_user(email="cook@example.com", password="Cook123!")
+        self.profile = UserProfile.objects.create(user=user, username="Cook")
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        self.recipes = [
+            create_recipe_with_ingredients(self.profile, f"Card {index}", 2)
+            for index in range(5)
+        ]
+        set_recipe_relation(self.recipes[0].pk, self.profile.pk, "liked_by", True)
+        set_recipe_relation(self.recipes[1].pk, self.profile.pk, "saved_by", True)
+
+    def test_cached_page_costs_page_and_flags_queries(self):
+        url = reverse("cookscorner-recipes-by-categories") + "?category=Lunch&cursor="
+        self.client.get(url)
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        cards = {card["slug"]: card for card in response.data["data"]}
+        self.assertEqual(len(cards), 5)
+        self.assertTrue(cards[self.recipes[0].slug]["is_liked"])
+        self.assertFalse(cards[self.recipes[0].slug]["is_saved"])
+        self.assertTrue(cards[self.recipes[1].slug]["is_saved"])
+        self.assertEqual(cards[self.recipes[0].slug]["likes"], 1)
+
+    def test_author_rename_changes_list_etag(self):
+        url = reverse("cookscorner-recipes-by-categories") + "?category=Lunch&cursor="
+        response = self.client.get(url)
+        self.profile.username = "New Cook"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {card["author_name"] for card in response.data["data"]}, {"New Cook"}
+        )
+
+    def test_like_and_save_keep_their_response_body(self):
+        user = self.profile.user
+        user.is_verified = True
+        user.save(update_fields=["is_verified"])
+        self.client.force_authenticate(user)
+        slug = self.recipes[2].slug
+        for name in ("cookscorner-like-recipe", "cookscorner-save-recipe"):
+            url = reverse(name, kwargs={"slug": slug})
+            for method in (self.client.put, self.client.delete):
+                response = method(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data, {"Error": "Success."})
+
+    def test_card_computed_before_invalidation_is_not_served(self):
+        recipe_id = self.recipes[0].pk
+
+        def compute_then_invalidate(missing_ids):
+            # The recipe changes while its old card is being built.
+            with self.captureOnCommitCallbacks(execute=True):
+                schedule_recipe_invalidation(recipe_id)
+            return {pk: {"name": "stale"} for pk in missing_ids}
+
+        get_cached_recipe_cards([recipe_id], compute_then_invalidate)
+        cards = get_cached_recipe_cards(
+            [recipe_id],
+            lambda missing_ids: {pk: {"name": "fresh"} for pk in missing_ids},
+        )
+        self.assertEqual(cards[recipe_id]["name"], "fresh")
+
+
+class CursorPaginationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_local_caches()
+        user = User.objects.create_user(email="pager@example.com", password="Page123!")
+        self.profile = UserProfile.objects.create(user=user, username="Pager")
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        self.recipes = [
+            create_recipe_with_ingredients(self.profile, f"Page {index}", 1)
+            for index in range(5)
+        ]
+        self.url = reverse("cookscorner-recipes-by-categories")
+
+    def get_page(self, cursor="", limit=2):
+        return self.client.get(
+            self.url, {"category": "Lunch", "cursor": cursor, "limit": limit}
+        )
+
+    def encode(self, payload):
+        data = json.dumps(payload, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+    def test_pages_round_trip(self):
+        slugs, cursor, pages = [], "", []
+        while cursor is not None:
+            response = self.get_page(cursor)
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.data)
+            slugs += [card["slug"] for card in response.data["data"]]
+            cursor = response.data["next"]
+        expected = [recipe.slug for recipe in reversed(self.recipes)]
+        self.assertEqual(slugs, expected)
+        self.assertEqual(len(pages), 3)
+        response = self.get_page(pages[-1]["prev"])
+        self.assertEqual(
+            [card["slug"] for card in response.data["data"]], expected[2:4]
+        )
+
+    def test_tampered_cursor_is_rejected(self):
+        cursor = self.get_page().data["next"]
+        for tampered in (cursor[:-3] + "!!!", cursor[1:], "not a cursor"):
+            response = self.get_page(tampered)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.data["cursor"], "Invalid cursor.")
+
+    def test_wrong_type_cursor_is_rejected(self):
+        for payload in (
+            {"v": ["not-a-date", 1], "r": False},
+            {"v": [{"x": 1}, [2]], "r": False},
+            {"v": [None, None], "r": False},
+            {"v": ["2026-01-01T00:00:00+00:00"], "r": False},
+            {"v": ["2026-01-01T00:00:00+00:00", 1], "r": "yes"},
+            [1, 2],
+        ):
+            response = self.get_page(self.encode(payload))
+            self.assertEqual(response.status_code, 400, payload)
+            self.assertEqual(response.data["cursor"], "Invalid cursor.")
+
+
+class IngredientSimilarityTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_local_caches()
+        user = User.objects.create_user(
+            email="taster@example.com", password="Taste123!"
+        )
+        self.profile = UserProfile.objects.create(user=user, username="Taster")
+
+    def create_recipe(self, name, ingredient_names):
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe = Recipe.objects.create(
+                author=self.profile,
+                name=name,
+                description="Description",
+                meal_picture="cookscorner/recipe_images/meal.jpeg",
+            )
+            for ingredient_name in ingredient_names:
+                ingredient, _ = Ingredient.objects.get_or_create(
+                    ingredient_name=ingredient_name
+                )
+                RecipeIngredients.objects.create(
+                    recipe=recipe, ingredient=ingredient, amount="1", unit="kg"
+                )
+        return recipe
+
+    def test_recipes_without_ingredients_are_not_indexed(self):
+        self.assertIsNone(signature([]))
+        first = self.create_recipe("Empty one", [])
+        second = self.create_recipe("Empty two", [])
+        rebuild_minhashes()
+        self.assertFalse(RecipeLSHBucket.objects.exists())
+        self.assertEqual(find_similar_by_ingredients(first.pk, 5), [])
+        self.assertEqual(find_similar_by_ingredients(second.pk, 5), [])
+
+    def test_new_similar_recipe_refreshes_cached_detail(self):
+        recipe = self.create_recipe("Original", ["Rice", "Egg", "Onion", "Peas"])
+        url = reverse("cookscorner-recipe-detail", kwargs={"slug": recipe.slug})
+        client = APIClient()
+        client.force_authenticate(self.profile.user)
+        response = client.get(url)
+        self.assertEqual(response.data["similar"], [])
+        copy = self.create_recipe("Copy", ["Rice", "Egg", "Onion", "Peas"])
+        response = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item["slug"] for item in response.data["similar"]], [copy.slug]
+        )
+
+    def test_rebuild_refreshes_cached_detail(self):
+        recipe = self.create_recipe("Original", ["Rice", "Egg", "Onion", "Peas"])
+        copy = self.create_recipe("Copy", ["Rice", "Egg", "Onion", "Peas"])
+        RecipeLSHBucket.objects.all().delete()
+        RecipeMinHash.objects.all().delete()
+        url = reverse("cookscorner-recipe-detail", kwargs={"slug": recipe.slug})
+        client = APIClient()
+        client.force_authenticate(self.profile.user)
+        response = client.get(url)
+        self.assertEqual(response.data["similar"], [])
+        with self.captureOnCommitCallbacks(execute=True):
+            rebuild_minhashes()
+        response = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item["slug"] for item in response.data["similar"]], [copy.slug]
+        )
+
+    def test_candidates_sharing_more_bands_are_kept(self):
+        base = [f"Spice {index}" for index in range(8)]
+        recipe = self.create_recipe("Base", base)
+        others = [
+            self.create_recipe("Close", base[:7] + ["Salt"]),
+            self.create_recipe("Middle", base[:6] + ["Salt", "Sugar"]),
+            self.create_recipe("Far", base[:5] + ["Salt", "Sugar", "Flour"]),
+        ]
+        own = set(
+            RecipeLSHBucket.objects.filter(recipe=recipe).values_list("band", "bucket")
+        )
+        shared = {
+            other.pk: len(
+                own
+                & set(
+                    RecipeLSHBucket.objects.filter(recipe=other).values_list(
+                        "band", "bucket"
+                    )
+                )
+            )
+            for other in others
+        }
+        best = min(shared, key=lambda pk: (-shared[pk], pk))
+        self.assertGreater(shared[best], 0)
+        with patch("receipts.minhash.MAX_SIMILAR_CANDIDATES", 1):
+            self.assertEqual(find_similar_by_ingredients(recipe.pk, 5), [best])
+
+
+class IngredientIndexTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_local_caches()
+        user = User.objects.create_user(email="pantry@example.com", password="Pantry1!")
+        self.profile = UserProfile.objects.create(user=user, username="Pantry")
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        self.url = reverse("cookscorner-recipes-by-ingredients")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.omelette = self.create_recipe("Omelette", ["Egg", "Milk"])
+            self.pancakes = self.create_recipe(
+                "Pancakes", ["Egg", "Milk", "Flour", "Sugar"]
+            )
+            self.salad = self.create_recipe("Salad", ["Tomato", "Cucumber"])
+
+    def create_recipe(self, name, ingredient_names):
+        recipe = Recipe.objects.create(
+            author=self.profile,
+            name=name,
+            description="Description",
+            meal_picture="cookscorner/recipe_images/meal.jpeg",
+        )
+        for ingredient_name in ingredient_names:
+            ingredient, _ = Ingredient.objects.get_or_create(
+                ingredient_name=ingredient_name
+            )
+            RecipeIngredients.objects.create(
+                recipe=recipe, ingredient=ingredient, amount="1", unit="pcs"
+            )
+        return recipe
+
+    def postings(self):
+        return set(
+            IngredientPosting.objects.values_list(
+                "ingredient__ingredient_name", "recipe__name", "required"
+            )
+        )
+
+    def test_rebuild_matches_incremental_index(self):
+        incremental = self.postings()
+        self.assertIn(("Egg", "Pancakes", 4), incremental)
+        IngredientPosting.objects.all().delete()
+        self.assertEqual(rebuild_postings(), 8)
+        self.assertEqual(self.postings(), incremental)
+
+    def test_index_follows_edits_and_deletes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            RecipeIngredients.objects.filter(
+                recipe=self.pancakes, ingredient__ingredient_name="Sugar"
+            ).delete()
+        self.assertIn(("Egg", "Pancakes", 3), self.postings())
+        self.assertNotIn("Sugar", {name for name, _, _ in self.postings()})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.salad.delete()
+        self.assertNotIn("Salad", {recipe for _, recipe, _ in self.postings()})
+
+    def test_ranking_by_coverage(self):
+        ranked = find_recipes_by_ingredients(["Egg", "Milk", "Flour"], 10)
+        self.assertEqual(ranked, [(self.omelette.pk, 2, 2), (self.pancakes.pk, 3, 4)])
+        self.assertEqual(find_recipes_by_ingredients(["Unknown"], 10), [])
+
+    def test_api_reports_matched_and_missing(self):
+        response = self.client.get(self.url, {"ingredients": "Egg, Flour,Unknown"})
+        self.assertEqual(response.status_code, 200)
+        cards = response.data["data"]
+        self.assertEqual(
+            [card["slug"] for card in cards], [self.omelette.slug, self.pancakes.slug]
+        )
+        self.assertEqual(
+            [(card["matched"], card["required"], card["missing"]) for card in cards],
+            [(1, 2, 1), (2, 4, 2)],
+        )
+        self.assertEqual([card["coverage"] for card in cards], [0.5, 0.5])
+
+    def test_api_requires_ingredients(self):
+        for params in ({}, {"ingredients": " , "}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.data["Error"], "Ingredients are required.")
+
+
+class RecipeSearchTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_local_caches()
+        user = User.objects.create_user(email="finder@example.com", password="Find123!")
+        self.profile = UserProfile.objects.create(user=user, username="Finder")
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        self.url = reverse("cookscorner-search-recipes")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.by_name = self.create_recipe("Borscht", "A soup.", ["Beet"])
+            self.by_ingredient = self.create_recipe(
+                "Red soup", "Hearty.", ["Borscht base"]
+            )
+            self.by_description = self.create_recipe(
+                "Stew", "Not quite a borscht.", ["Potato"]
+            )
+            self.cyrillic = self.create_recipe("Борщ", "Суп.", ["Свёкла"])
+
+    def create_recipe(self, name, description, ingredient_names):
+        recipe = Recipe.objects.create(
+            author=self.profile,
+            name=name,
+            description=description,
+            meal_picture="cookscorner/recipe_images/meal.jpeg",
+        )
+        for ingredient_name in ingredient_names:
+            ingredient, _ = Ingredient.objects.get_or_create(
+                ingredient_name=ingredient_name
+            )
+            RecipeIngredients.objects.create(
+                recipe=recipe, ingredient=ingredient, amount="1", unit="kg"
+            )
+        return recipe
+
+    def search(self, term):
+        response = self.client.get(self.url, {"search": term})
+        self.assertEqual(response.status_code, 200)
+        return [card["slug"] for card in response.data["data"]]
+
+    def test_name_ranks_above_ingredients_and_description(self):
+        self.assertEqual(
+            self.search("borscht"),
+            [self.by_name.slug, self.by_ingredient.slug, self.by_description.slug],
+        )
+
+    def test_prefix_and_case_insensitive_matching(self):
+        self.assertEqual(self.search("BORS")[:1], [self.by_name.slug])
+        self.assertEqual(self.search("БОРЩ"), [self.cyrillic.slug])
+        self.assertEqual(self.search("СВЁК"), [self.cyrillic.slug])
+
+    def test_empty_query_returns_all_recipes(self):
+        for term in ("", "   ", '"*()-:^'):
+            self.assertEqual(len(self.search(term)), 4)
+
+    def test_special_characters_are_not_query_syntax(self):
+        self.assertEqual(self.search('borscht") OR ("'), [])
+        self.assertEqual(self.search("name:stew"), [])
+        self.assertEqual(self.search('"stew"*'), [self.by_description.slug])
+        self.assertEqual(self.search("NEAR AND NOT"), [])
+
+    def test_sqlite_tokens_are_quoted(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("FTS5 fallback only")
+        engine = SQLiteRecipeSearch()
+        queryset = engine.search(Recipe.objects.all(), ['bor"scht', "OR"])
+        self.assertEqual(list(queryset), [])
+        queryset = engine.search(Recipe.objects.all(), ["stew"])
+        self.assertEqual([recipe.pk for recipe in queryset], [self.by_description.pk])
+
+
+@patch("receipts.feed.FANOUT_MAX_FOLLOWERS", 2)
+class FeedTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_local_caches()
+        self.reader = self.create_profile("Reader")
+        self.small = self.create_profile("Small")
+        self.big = self.create_profile("Big")
+        self.fan = self.create_profile("Fan")
+        set_following(self.reader.pk, self.small.pk, True)
+        set_following(self.reader.pk, self.big.pk, True)
+        set_following(self.fan.pk, self.big.pk, True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader.user)
+        self.url = reverse("cookscorner-recipes-feed")
+
+    def create_profile(self, username):
+        user = User.objects.create_user(
+            email=f"{username.lower()}@example.com", password="Feed123!"
+        )
+        return UserProfile.objects.create(user=user, username=username)
+
+    def post_recipe(self, author, name):
+        recipe = Recipe.objects.create(
+            author=author,
+            name=name,
+            description="Description",
+            meal_picture="cookscorner/recipe_images/meal.jpeg",
+        )
+        enqueue_fanout(Recipe.objects.select_related("author").get(pk=recipe.pk))
+        while process_fanout_batch():
+            pass
+        return recipe
+
+    def read_feed(self, limit=10):
+        slugs, cursor = [], ""
+        while cursor is not None:
+            response = self.client.get(self.url, {"cursor": cursor, "limit": limit})
+            self.assertEqual(response.status_code, 200)
+            slugs += [card["slug"] for card in response.data["data"]]
+            cursor = response.data["next"]
+        return slugs
+
+    def test_small_chef_is_fanned_out_and_big_chef_merged(self):
+        small = self.post_recipe(self.small, "Small dish")
+        big = self.post_recipe(self.big, "Big dish")
+        self.assertTrue(
+            FeedEntry.objects.filter(owner=self.reader, recipe=small).exists()
+        )
+        self.assertFalse(FeedEntry.objects.filter(recipe=big).exists())
+        self.assertEqual(self.read_feed(), [big.slug, small.slug])
+
+    def test_pages_interleave_both_sources(self):
+        recipes = [
+            self.post_recipe(self.small if index % 2 else self.big, f"Dish {index}")
+            for index in range(7)
+        ]
+        expected = [recipe.slug for recipe in reversed(recipes)]
+        self.assertEqual(self.read_feed(limit=2), expected)
+        self.assertEqual(self.read_feed(limit=3), expected)
+
+    def test_merged_recipes_survive_dropping_below_threshold(self):
+        big = self.post_recipe(self.big, "Big dish")
+        set_following(self.fan.pk, self.big.pk, False)
+        self.big.refresh_from_db()
+        self.assertLess(self.big.followers_count, 2)
+        self.assertEqual(self.read_feed(), [big.slug])
+
+        later = self.post_recipe(self.big, "Later dish")
+        self.assertTrue(FeedEntry.objects.filter(recipe=later).exists())
+        self.assertEqual(self.read_feed(), [later.slug, big.slug])
+
+    def test_unfollow_removes_both_sources(self):
+        self.post_recipe(self.small, "Small dish")
+        self.post_recipe(self.big, "Big dish")
+        set_following(self.reader.pk, self.small.pk, False)
+        set_following(self.reader.pk, self.big.pk, False)
+        self.assertEqual(self.read_feed(), [])
+
+
+class TrendingRecipesTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_local_caches()
+        user = User.objects.create_user(email="trend@example.com", password="Trend123!")
+        self.profile = UserProfile.objects.create(user=user, username="Trend")
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        self.now = timezone.now()
+
+    def create_recipe(self, name, category="Lunch", likes=0, saves=0, age=None):
+        recipe = Recipe.objects.create(
+            author=self.profile,
+            name=name,
+            description="Description",
+            meal_picture="cookscorner/recipe_images/meal.jpeg",
+            category=category,
+        )
+        Recipe.objects.filter(pk=recipe.pk).update(
+            likes_count=likes,
+            saves_count=saves,
+            created_at=self.now - (age or timedelta()),
+        )
+        return recipe
+
+    def refresh(self, now):
+        update_trending_scores(now=now)
+        clear_local_caches()
+
+    def test_older_engagement_decays(self):
+        old = self.create_recipe("Old", likes=10, age=timedelta(days=3))
+        new = self.create_recipe("New", likes=1, saves=1)
+        self.refresh(self.now)
+        self.assertAlmostEqual(TrendingRecipe.objects.get(recipe=old).score, 1.25)
+        self.assertAlmostEqual(TrendingRecipe.objects.get(recipe=new).score, 3.0)
+        self.assertEqual(get_trending_recipe_ids("Lunch", 10), [new.pk, old.pk])
+
+        # Only the likes gained since the last refresh count in full.
+        Recipe.objects.filter(pk=old.pk).update(likes_count=18)
+        self.refresh(self.now + timedelta(days=2))
+        self.assertAlmostEqual(TrendingRecipe.objects.get(recipe=old).score, 8.3125)
+        self.assertAlmostEqual(TrendingRecipe.objects.get(recipe=new).score, 0.75)
+        self.assertEqual(get_trending_recipe_ids("Lunch", 10), [old.pk, new.pk])
+
+    def test_recipes_without_engagement_are_left_out(self):
+        liked = self.create_recipe("Liked", likes=1)
+        self.create_recipe("Ignored")
+        self.refresh(self.now)
+        self.assertEqual(get_trending_recipe_ids("Lunch", 10), [liked.pk])
+
+    def test_trending_is_filtered_by_category(self):
+        lunch = self.create_recipe("Soup", likes=2)
+        dinner = self.create_recipe("Steak", category="Dinner", likes=5)
+        self.refresh(self.now)
+        url = reverse("cookscorner-recipes-trending")
+        response = self.client.get(url, {"category": "Lunch"})
+        self.assertEqual([card["slug"] for card in response.data["data"]], [lunch.slug])
+        response = self.client.get(url, {"category": "Dinner"})
+        self.assertEqual(
+            [card["slug"] for card in response.data["data"]], [dinner.slug]
+        )
+        response = self.client.get(url)
+        self.assertEqual(response.data["data"], [])
+
+        Recipe.objects.filter(pk=dinner.pk).update(category="Lunch")
+        self.refresh(self.now)
+        self.assertEqual(get_trending_recipe_ids("Lunch", 10), [dinner.pk, lunch.pk])
+        self.assertEqual(get_trending_recipe_ids("Dinner", 10), [])
+
+
+class SimilarRecipesTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_local_caches()
+        self.profiles = []
+        for index in range(3):
+            user = User.objects.create_user(
+                email=f"fan{index}@example.com", password="Fan123!"
+            )
+            self.profiles.append(
+                UserProfile.objects.create(user=user, username=f"Fan {index}")
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.profiles[0].user)
+        self.recipes = {
+            name: create_recipe_with_ingredients(self.profiles[0], name, 0)
+            for name in ("Apple pie", "Berry tart", "Cherry cake", "Dumplings")
+        }
+        likes = {
+            "Apple pie": [0, 1, 2],
+            "Berry tart": [0, 1],
+            "Cherry cake": [2],
+        }
+        for name, indexes in likes.items():
+            for index in indexes:
+                set_recipe_relation(
+                    self.recipes[name].pk, self.profiles[index].pk, "liked_by", True
+                )
+
+    def neighbors(self, name):
+        return list(
+            RecipeNeighbor.objects.filter(recipe=self.recipes[name])
+            .order_by("rank")
+            .values_list("neighbor__name", "score")
+        )
+
+    def test_neighbors_are_ranked_by_cosine_similarity(self):
+        self.assertEqual(compute_similar_recipes(), 3)
+        neighbors = self.neighbors("Apple pie")
+        self.assertEqual([name for name, _ in neighbors], ["Berry tart", "Cherry cake"])
+        self.assertAlmostEqual(neighbors[0][1], 2 / (3**0.5 * 2**0.5), places=5)
+        self.assertAlmostEqual(neighbors[1][1], 1 / 3**0.5, places=5)
+        self.assertEqual(
+            [name for name, _ in self.neighbors("Berry tart")], ["Apple pie"]
+        )
+        self.assertEqual(self.neighbors("Dumplings"), [])
+
+    def test_recompute_replaces_stale_neighbors(self):
+        compute_similar_recipes()
+        set_recipe_relation(
+            self.recipes["Cherry cake"].pk, self.profiles[2].pk, "liked_by", False
+        )
+        compute_similar_recipes()
+        self.assertEqual(
+            [name for name, _ in self.neighbors("Apple pie")], ["Berry tart"]
+        )
+        self.assertEqual(self.neighbors("Cherry cake"), [])
+
+    def test_recompute_refreshes_cached_detail(self):
+        recipe = self.recipes["Berry tart"]
+        url = reverse("cookscorner-recipe-detail", kwargs={"slug": recipe.slug})
+        response = self.client.get(url)
+        self.assertEqual(response.data["similar"], [])
+        with self.captureOnCommitCallbacks(execute=True):
+            compute_similar_recipes()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item["slug"] for item in response.data["similar"]],
+            [self.recipes["Apple pie"].slug],
+        )
+
+    def test_detail_lists_neighbors(self):
+        compute_similar_recipes()
+        recipe = self.recipes["Apple pie"]
+        url = reverse("cookscorner-recipe-detail", kwargs={"slug": recipe.slug})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item["slug"] for item in response.data["similar"]],
+            [self.recipes["Berry tart"].slug, self.recipes["Cherry cake"].slug],
+        )
+
+
+class LocalCacheTest(TestCase):
+    def setUp(self):
+        self.local = LocalCache("test_local_cache", max_size=2, timeout=60)
+        get_cache_stats("test_shared").reset()
+
+    def test_load_invalidated_meanwhile_is_not_stored(self):
+        def load_key():
+            self.local.evict("key")
+            return "stale"
+
+        def load_all():
+            self.local.evict()
+            return "stale"
+
+        for load in (load_key, load_all):
+            self.assertEqual(self.local.get_or_set("key", load), "stale")
+            self.assertIsNone(self.local.get("key"))
+        self.assertEqual(self.local.get_or_set("key", lambda: "fresh"), "fresh")
+        self.assertEqual(self.local.get("key"), "fresh")
+
+    def test_other_keys_do_not_block_a_load(self):
+        def load():
+            self.local.evict("other")
+            return "value"
+
+        self.local.get_or_set("key", load)
+        self.assertEqual(self.local.get("key"), "value")
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.local.set("a", 1)
+        self.local.set("b", 2)
+        self.local.get("a")
+        self.local.set("c", 3)
+        self.assertEqual(self.local.get_many(["a", "b", "c"]), {"a": 1, "c": 3})
+        stats = self.local.snapshot()
+        self.assertEqual(stats["size"], 2)
+        self.assertEqual(stats["evictions"], 1)
+        self.assertEqual((stats["hits"], stats["misses"]), (3, 1))
+        self.assertEqual(stats["hit_ratio"], 0.75)
+
+    def test_bus_invalidates_after_commit(self):
+        self.local.set("a", 1)
+        self.local.set("b", 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            publish_invalidation("test_local_cache", "a")
+            self.assertEqual(self.local.get("a"), 1)
+        self.assertEqual(self.local.get_many(["a", "b"]), {"b": 2})
+        with self.captureOnCommitCallbacks(execute=True):
+            publish_invalidation("test_local_cache")
+        self.assertEqual(self.local.get_many(["a", "b"]), {})
+        self.assertEqual(self.local.snapshot()["invalidations"], 2)
+
+    def test_stats_view_is_for_admins(self):
+        self.local.set("a", 1)
+        self.local.get("a")
+        get_cache_stats("test_shared").miss()
+        url = reverse("cookscorner-cache-stats")
+        client = APIClient()
+        user = User.objects.create_user(email="stats@example.com", password="Stat123!")
+        client.force_authenticate(user)
+        self.assertEqual(client.get(url).status_code, 403)
+
+        admin = User.objects.create_superuser(
+            email="admin@example.com", password="Admin123!"
+        )
+        client.force_authenticate(admin)
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["local"]["test_local_cache"]["hits"], 1)
+        self.assertEqual(response.data["shared"]["test_shared"]["misses"], 1)
+
+    def test_reads_do_not_start_the_listener(self):
+        with patch("utils.local_cache.ensure_listening") as ensure_listening:
+            self.local.get("key")
+            self.local.get_many(["key", "other"])
+            ensure_listening.assert_not_called()
+            self.local.set("key", 1)
+            ensure_listening.assert_called_once()
+
+
+class RecipeDetailStampedeTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        clear_local_caches()
+        user = User.objects.create_user(email="busy@example.com", password="Busy123!")
+        profile = UserProfile.objects.create(user=user, username="Busy")
+        self.recipe = create_recipe_with_ingredients(profile, "Popular", 3)
+
+    def test_simultaneous_misses_compute_once(self):
+        workers = 8
+        barrier = threading.Barrier(workers)
+        computations = []
+        results = []
+
+        def compute():
+            computations.append(get_recipe_detail(self.recipe.slug).pk)
+            return {"name": self.recipe.name}
+
+        def worker():
+            try:
+                barrier.wait()
+                results.append(get_cached_recipe_detail(self.recipe.slug, compute))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(computations, [self.recipe.pk])
+        self.assertEqual(results, [{"name": "Popular"}] * workers)
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+use_local_storage = override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {
+            "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+        },
+    },
+    UPLOAD_BACKEND="utils.uploads.LocalUploadBackend",
+)
+
+
+def make_image(size=(400, 200), image_format="JPEG"):
+    output = io.BytesIO()
+    Image.new("RGB", size, "orange").save(output, image_format)
+    return output.getvalue()
+
+
+@use_local_storage
+class ImageVariantsTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        clear_local_caches()
+        user = User.objects.create_user(email="photo@example.com", password="Photo123!")
+        profile = UserProfile.objects.create(user=user, username="Photo")
+        name = default_storage.save("recipe_images/meal.jpg", ContentFile(make_image()))
+        self.recipe = Recipe.objects.create(
+            author=profile, name="Photo", description="Description", meal_picture=name
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def process(self):
+        with ThreadPoolExecutor(1) as executor, self.captureOnCommitCallbacks(
+            execute=True
+        ):
+            return process_pending_images(IMAGE_VARIANT_SPECS, executor)
+
+    def test_variants_are_rendered_without_upscaling(self):
+        self.assertEqual(self.process(), 1)
+        self.recipe.refresh_from_db()
+        variants = self.recipe.meal_picture_variants
+        self.assertEqual(sorted(variants["webp"], key=int), ["150", "300", "400"])
+        with default_storage.open(variants["jpeg"]["150"]) as file:
+            self.assertEqual(Image.open(file).size, (150, 75))
+        self.assertEqual(self.process(), 0)
+
+    def test_lists_show_the_card_and_detail_the_variants(self):
+        url = reverse("cookscorner-recipes-by-categories") + "?category=Lunch&cursor="
+        card = self.client.get(url).data["data"][0]
+        self.assertTrue(card["meal_picture"].endswith("meal.jpg"))
+
+        self.process()
+        card = self.client.get(url).data["data"][0]
+        self.assertTrue(card["meal_picture"].endswith("meal-300w.webp"))
+        detail_url = reverse(
+            "cookscorner-recipe-detail", kwargs={"slug": self.recipe.slug}
+        )
+        detail = self.client.get(detail_url).data
+        self.assertEqual(set(detail["meal_picture_variants"]), {"webp", "jpeg"})
+        self.assertTrue(detail["meal_picture"].endswith("meal.jpg"))
+
+    def test_replaced_images_are_queued_again(self):
+        self.process()
+        self.recipe.refresh_from_db()
+        self.recipe.description = "Same picture"
+        self.recipe.save()
+        self.assertEqual(self.process(), 0)
+
+        self.recipe.meal_picture = default_storage.save(
+            "recipe_images/new.jpg", ContentFile(make_image())
+        )
+        self.recipe.save()
+        self.assertEqual(self.recipe.meal_picture_variants, {})
+        profile = self.recipe.author
+        UserProfile.objects.filter(pk=profile.pk).update(
+            profile_picture_variants={"source": "user_profile/old.jpg"}
+        )
+        profile.profile_picture = default_storage.save(
+            "user_profile/avatar.jpg", ContentFile(make_image())
+        )
+        profile.save(update_fields=["profile_picture"])
+        self.assertEqual(self.process(), 2)
+        self.recipe.refresh_from_db()
+        profile.refresh_from_db()
+        self.assertEqual(
+            self.recipe.meal_picture_variants["source"], self.recipe.meal_picture.name
+        )
+        self.assertIn("webp", profile.profile_picture_variants)
+
+
+@use_local_storage
+class UploadTicketTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_local_caches()
+        self.user = User.objects.create_user(
+            email="upload@example.com", password="Upload123!", is_verified=True
+        )
+        UserProfile.objects.create(user=self.user, username="Upload")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, ticket_url):
+        ticket = self.client.post(reverse(ticket_url)).data
+        file = ContentFile(make_image(), name="meal.jpg")
+        response = self.client.post(
+            ticket["url"], {**ticket["fields"], "file": file}, format="multipart"
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["key"], ticket["key"])
+        return ticket
+
+    def add_recipe(self, key):
+        data = {
+            "name": "Uploaded",
+            "description": "Description",
+            "meal_picture_key": key,
+            "ingredients": [{"ingredient_name": "Salt", "amount": "1", "unit": "g"}],
+        }
+        return self.client.post(reverse("cookscorner-recipe-add"), data, format="json")
+
+    def test_recipe_is_created_from_uploaded_key(self):
+        ticket = self.upload("cookscorner-recipe-upload-ticket")
+        response = self.add_recipe(ticket["key"])
+        self.assertEqual(response.status_code, 201)
+        recipe = Recipe.objects.get(name="Uploaded")
+        self.assertEqual(recipe.meal_picture.name, ticket["key"])
+
+        # A ticket uploads one file.
+        file = ContentFile(make_image(), name="other.jpg")
+        response = self.client.post(
+            ticket["url"], {**ticket["fields"], "file": file}, format="multipart"
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_keys_are_checked(self):
+        ticket = self.client.post(reverse("cookscorner-recipe-upload-ticket")).data
+        self.assertEqual(self.add_recipe(ticket["key"]).status_code, 400)
+        other = User.objects.create_user(email="other@example.com", password="x")
+        foreign_key = ticket["key"].replace(f"/{self.user.pk}-", f"/{other.pk}-")
+        self.assertEqual(self.add_recipe(foreign_key).status_code, 400)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_profile_picture_from_uploaded_key(self):
+        ticket = self.upload("cookscorner-profile-upload-ticket")
+        response = self.client.put(
+            reverse("cookscorner-myprofile"),
+            {"username": "Upload", "profile_picture_key": ticket["key"]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.user.profile.refresh_from_db()
+        self.assertEqual(self.user.profile.profile_picture.name, ticket["key"])
+
+
+@use_local_storage
+class StreamingImageUploadTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_local_caches()
+        user = User.objects.create_user(
+            email="stream@example.com", password="Stream123!", is_verified=True
+        )
+        UserProfile.objects.create(user=user, username="Stream")
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def add_recipe(self, content, name="meal.jpg"):
+        data = {
+            "name": "Streamed",
+            "description": "Description",
+            "meal_picture": ContentFile(content, name=name),
+            "ingredients": '[{"ingredient_name": "Salt", "amount": "1", "unit": "g"}]',
+        }
+        return self.client.post(
+            reverse("cookscorner-recipe-add"), data, format="multipart"
+        )
+
+    def receive(self, handler, content, chunk_size=64 * 1024):
+        handler.new_file("meal_picture", "meal.png", "image/png", None)
+        for start in range(0, len(content), chunk_size):
+            handler.receive_data_chunk(content[start : start + chunk_size], start)
+        return handler.file_complete(len(content))
+
+    def test_multipart_image_is_accepted(self):
+        response = self.add_recipe(make_image())
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Recipe.objects.get().meal_picture.name.endswith(".jpg"))
+
+    def test_junk_is_rejected_on_the_first_chunk(self):
+        handler = ImageUploadHandler(HttpRequest())
+        with self.assertRaises(StopUpload):
+            self.receive(handler, b"x" * 10 * 1024 * 1024)
+        self.assertEqual(handler.size, 64 * 1024)
+
+        response = self.add_recipe(b"x" * 1024 * 1024)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("not a JPEG", response.data["Error"])
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_huge_dimensions_are_rejected_from_the_header(self):
+        output = io.BytesIO()
+        Image.new("1", (8000, 6000)).save(output, "PNG")
+        response = self.add_recipe(output.getvalue(), "meal.png")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("dimensions", response.data["Error"])
+
+    def test_large_images_are_spooled_to_disk(self):
+        output = io.BytesIO()
+        Image.frombytes("RGB", (400, 400), os.urandom(400 * 400 * 3)).save(
+            output, "PNG"
+        )
+        uploaded = self.receive(ImageUploadHandler(HttpRequest()), output.getvalue())
+        self.assertIsInstance(uploaded, TemporaryUploadedFile)
+        self.assertEqual(uploaded.size, len(output.getvalue()))
+        with Image.open(uploaded) as image:
+            self.assertEqual(image.size, (400, 400))
@@ -0,0 +1,104 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import CATEGORY_CHOICES, Recipe, TrendingRecipe
+from utils.cache import get_cache_stats, get_or_compute
+from utils.local_cache import LocalCache, publish_invalidation
+from utils.pagination import MAX_PAGE_LIMIT
+
+LIKE_WEIGHT = 1.0
+SAVE_WEIGHT = 2.0
+HALF_LIFE = timedelta(hours=24)
+TRENDING_CACHE_TIMEOUT = 60
+
+trending_stats = get_cache_stats("trending")
+trending_ids = LocalCache("trending", max_size=100, timeout=TRENDING_CACHE_TIMEOUT)
+
+
+def _decay(elapsed, half_life):
+    return 0.5 ** (max(elapsed.total_seconds(), 0) / half_life.total_seconds())
+
+
+def _engagement(likes, saves):
+    return LIKE_WEIGHT * likes + SAVE_WEIGHT * saves
+
+
+def update_trending_scores(half_life=HALF_LIFE, chunk_size=1000, now=None):
+    """
+    Decays every stored score by the time since its last refresh and adds
+    the likes and saves gained since then. Recipes seen for the first time
+    count their whole engagement, decayed by their age.
+    """
+    now = now or timezone.now()
+    last_id = 0
+    updated = 0
+    while True:
+        rows = list(
+            Recipe.objects.filter(pk__gt=last_id)
+            .order_by("pk")
+            .values_list("pk", "category", "likes_count", "saves_count", "created_at")[
+                :chunk_size
+            ]
+        )
+        if not rows:
+            _invalidate_trending()
+            return updated
+        last_id = rows[-1][0]
+        scores = TrendingRecipe.objects.in_bulk([row[0] for row in rows])
+        created, changed = [], []
+        for recipe_id, category, likes, saves, created_at in rows:
+            trending = scores.get(recipe_id)
+            if trending is None:
+                score = _engagement(likes, saves) * _decay(now - created_at, half_life)
+                trending = TrendingRecipe(recipe_id=recipe_id)
+                created.append(trending)
+            else:
+                score = trending.score * _decay(now - trending.updated_at, half_life)
+                score += _engagement(
+                    likes - trending.likes_seen, saves - trending.saves_seen
+                )
+                changed.append(trending)
+            trending.category = category
+            trending.score = max(score, 0.0)
+            trending.likes_seen = likes
+            trending.saves_seen = saves
+            trending.updated_at = now
+        with transaction.atomic():
+            TrendingRecipe.objects.bulk_create(created)
+            TrendingRecipe.objects.bulk_update(
+                changed,
+                ["category", "score", "likes_seen", "saves_seen", "updated_at"],
+            )
+        updated += len(rows)
+
+
+def _trending_key(category):
+    return f"trending:{category}"
+
+
+def _invalidate_trending():
+    cache.delete_many([_trending_key(category) for category, _ in CATEGORY_CHOICES])
+    publish_invalidation("trending")
+
+
+def get_trending_recipe_ids(category, limit):
+    def compute():
+        return list(
+            TrendingRecipe.objects.filter(category=category, score__gt=0)
+            .order_by("-score")
+            .values_list("recipe_id", flat=True)[:MAX_PAGE_LIMIT]
+        )
+
+    recipe_ids = trending_ids.get_or_set(
+        category,
+        lambda: get_or_compute(
+            _trending_key(category),
+            compute,
+            TRENDING_CACHE_TIMEOUT,
+            stats=trending_stats,
+        ),
+    )
+    return recipe_ids[:limit]
@@ -9,10 +9,19 @@ from .views import (
     LikeRecipeAPIView,
     SaveRecipeAPIView,
     SearchRecipesAPIView,
+    RecipesByIngredientsAPIView,
+    FeedAPIView,
+    TrendingRecipesAPIView,
+    RecipeUploadTicketAPIView,
 )
 
 urlpatterns = [
     path("add-recipe/", AddRecipeAPIView.as_view(), name="cookscorner-recipe-add"),
+    path(
+        "upload-ticket/",
+        RecipeUploadTicketAPIView.as_view(),
+        name="cookscorner-recipe-upload-ticket",
+    ),
     path(
         "detail/<slug:slug>/",
         GetRecipeAPIView.as_view(),
@@ -40,4 +49,15 @@ urlpatterns = [
         "save/<slug:slug>/", SaveRecipeAPIView.as_view(), name="cookscorner-save-recipe"
     ),
     path("search/", SearchRecipesAPIView.as_view(), name="cookscorner-search-recipes"),
+    path("feed/", FeedAPIView.as_view(), name="cookscorner-recipes-feed"),
+    path(
+        "trending/",
+        TrendingRecipesAPIView.as_view(),
+        name="cookscorner-recipes-trending",
+    ),
+    path(
+        "by-ingredients/",
+        RecipesByIngredientsAPIView.as_view(),
+        name="cookscorner-recipes-by-ingredients",
+    ),
 ]
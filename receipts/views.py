@@ -1,25 +1,40 @@
 from rest_framework.views import Response, status, APIView
-from rest_framework.generics import ListAPIView
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
-from rest_framework import filters
 from drf_yasg.utils import swagger_auto_schema
 
 from .models import Recipe
 from .services import (
-    get_paginated_data,
-    create_recipe,
-    create_recipe_ingredinets_relation,
+    prepare_paginated_data,
+    prepare_ranked_recipes_data,
+    prepare_recipe_detail_data,
+    create_recipe_with_ingredients,
+    set_recipe_relation,
 )
-from .serializers import RecipeSerializer
+from .feed import get_feed_page
+from .ingredient_index import find_recipes_by_ingredients
+from .search import search_recipes
+from .trending import get_trending_recipe_ids
 from .swagger import (
     search_recipe_swagger,
     recipe_detail_swagger,
     recipe_list_swagger,
     recipe_by_category_swagger,
     add_recipe_swagger,
+    recipes_by_ingredients_swagger,
+    feed_swagger,
+    trending_swagger,
 )
 
 from userprofile.models import UserProfile
+from userprofile.swagger import upload_ticket_swagger
+from utils.conditional import conditional_get
+from utils.pagination import get_page_limit
+from utils.uploads import (
+    StreamingImageUploadMixin,
+    UploadTicketAPIView,
+    upload_error_response,
+)
 
 
 # Create your views here.
@@ -34,23 +49,21 @@ class GetRecipeAPIView(APIView):
         "о рецепте.",
         responses={
             200: recipe_detail_swagger["response"],
+            304: "Recipe is not modified.",
             404: "Recipe is not found.",
         },
     )
     def get(self, request, slug, *args, **kwargs):
         try:
-            recipe = Recipe.objects.get(slug=slug)
+            build, validators = prepare_recipe_detail_data(slug, request)
         except Exception:
             return Response(
                 {"Error": "Recipe is not found."}, status=status.HTTP_404_NOT_FOUND
             )
-        serializer = RecipeSerializer(
-            recipe, context={"request": request, "detail": True}
-        )
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return conditional_get(request, build, **validators)
 
 
-class AddRecipeAPIView(APIView):
+class AddRecipeAPIView(StreamingImageUploadMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     @swagger_auto_schema(
@@ -71,7 +84,14 @@ class AddRecipeAPIView(APIView):
             return Response(
                 {"Error": "User is not verified."}, status=status.HTTP_403_FORBIDDEN
             )
-        data = request.data
+        error = upload_error_response(request)
+        if error is not None:
+            return error
+        # Multipart bodies parse into an immutable QueryDict.
+        if hasattr(request.data, "dict"):
+            data = request.data.dict()
+        else:
+            data = dict(request.data)
         data["author"] = request.user.profile.id
         try:
             ingredients = data.pop("ingredients")
@@ -79,11 +99,11 @@ class AddRecipeAPIView(APIView):
             return Response(
                 {"Ingredients": "Required field"}, status=status.HTTP_400_BAD_REQUEST
             )
-        recipe = create_recipe(data=data)
         try:
-            create_recipe_ingredinets_relation(recipe=recipe, ingredients=ingredients)
+            create_recipe_with_ingredients(data=data, ingredients=ingredients)
+        except ValidationError:
+            raise
         except Exception:
-            recipe.delete()
             return Response(
                 {"Error": "Invalid ingredients field."},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -93,6 +113,21 @@ class AddRecipeAPIView(APIView):
         )
 
 
+class RecipeUploadTicketAPIView(UploadTicketAPIView):
+    upload_to = Recipe._meta.get_field("meal_picture").upload_to
+
+    @swagger_auto_schema(
+        tags=["Recipes"],
+        operation_description="Этот эндпоинт выдает "
+        "подписанный билет для загрузки "
+        "фото рецепта напрямую в хранилище. "
+        "Полученный key передается в meal_picture_key.",
+        responses={201: upload_ticket_swagger["response"]},
+    )
+    def post(self, request, *args, **kwargs):
+        return super().post(request, *args, **kwargs)
+
+
 class RecipesByCategoryAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -107,8 +142,8 @@ class RecipesByCategoryAPIView(APIView):
     def get(self, request, format=None):
         category = request.query_params.get("category", "Breakfast")
         queryset = Recipe.objects.filter(category=category)
-        data = get_paginated_data(queryset, request)
-        return Response(data, status=status.HTTP_200_OK)
+        build, validators = prepare_paginated_data(queryset, request)
+        return conditional_get(request, build, **validators)
 
 
 class RecipesByChefAPIView(APIView):
@@ -133,8 +168,8 @@ class RecipesByChefAPIView(APIView):
                 status=status.HTTP_404_NOT_FOUND,
             )
         queryset = Recipe.objects.filter(author=profile)
-        data = get_paginated_data(queryset, request)
-        return Response(data, status=status.HTTP_200_OK)
+        build, validators = prepare_paginated_data(queryset, request)
+        return conditional_get(request, build, **validators)
 
 
 class SavedByUserRecipesAPIView(APIView):
@@ -152,18 +187,39 @@ class SavedByUserRecipesAPIView(APIView):
     def get(self, request, *args, **kwargs):
         profile = request.user.profile
         queryset = profile.saves.all()
-        data = get_paginated_data(queryset, request)
-        return Response(data, status=status.HTTP_200_OK)
+        build, validators = prepare_paginated_data(queryset, request)
+        return conditional_get(request, build, **validators)
 
 
-class SaveRecipeAPIView(APIView):
+class RecipeRelationAPIView(APIView):
     permission_classes = [IsAuthenticated]
+    relation = None
+
+    def set_relation(self, request, slug, value):
+        user = request.user
+        if not user.is_verified:
+            return Response(
+                {"Error": "User is not verified."}, status=status.HTTP_403_FORBIDDEN
+            )
+        recipe_id = Recipe.objects.filter(slug=slug).values_list("pk", flat=True)
+        recipe_id = recipe_id.first()
+        if recipe_id is None:
+            return Response(
+                {"Error": "Recipe is not found."}, status=status.HTTP_404_NOT_FOUND
+            )
+        set_recipe_relation(recipe_id, user.profile.id, self.relation, value)
+        # Clients read the original key, misleading as it is.
+        return Response({"Error": "Success."}, status=status.HTTP_200_OK)
+
+
+class SaveRecipeAPIView(RecipeRelationAPIView):
+    relation = "saved_by"
 
     @swagger_auto_schema(
         tags=["Recipes"],
         operation_description="Этот эндпоинт предоставляет "
-        "возможность получить "
-        "все сохраненные пользователем рецепты. ",
+        "возможность сохранить рецепт. "
+        "Повторный запрос ничего не меняет.",
         responses={
             200: "Success.",
             403: "User is not verified.",
@@ -171,32 +227,31 @@ class SaveRecipeAPIView(APIView):
         },
     )
     def put(self, request, slug, *args, **kwargs):
-        user = request.user
-        if not user.is_verified:
-            return Response(
-                {"Error": "User is not verified."}, status=status.HTTP_403_FORBIDDEN
-            )
-        profile = user.profile
-        try:
-            recipe = Recipe.objects.get(slug=slug)
-        except Exception:
-            return Response(
-                {"Error": "Recipe is not found."}, status=status.HTTP_404_NOT_FOUND
-            )
-        if profile in recipe.saved_by.all():
-            recipe.saved_by.remove(profile)
-        else:
-            recipe.saved_by.add(profile)
-        return Response({"Error": "Success."}, status=status.HTTP_200_OK)
+        return self.set_relation(request, slug, True)
+
+    @swagger_auto_schema(
+        tags=["Recipes"],
+        operation_description="Этот эндпоинт предоставляет "
+        "возможность убрать рецепт из сохраненных. "
+        "Повторный запрос ничего не меняет.",
+        responses={
+            200: "Success.",
+            403: "User is not verified.",
+            404: "Recipe is not found.",
+        },
+    )
+    def delete(self, request, slug, *args, **kwargs):
+        return self.set_relation(request, slug, False)
 
 
-class LikeRecipeAPIView(APIView):
-    permission_classes = [IsAuthenticated]
+class LikeRecipeAPIView(RecipeRelationAPIView):
+    relation = "liked_by"
 
     @swagger_auto_schema(
         tags=["Recipes"],
         operation_description="Этот эндпоинт предоставляет "
-        "возможность сохранить рецепт. ",
+        "возможность поставить лайк рецепту. "
+        "Повторный запрос ничего не меняет.",
         responses={
             200: "Success.",
             403: "User is not verified.",
@@ -204,41 +259,120 @@ class LikeRecipeAPIView(APIView):
         },
     )
     def put(self, request, slug, *args, **kwargs):
-        user = request.user
-        if not user.is_verified:
-            return Response(
-                {"Error": "User is not verified."}, status=status.HTTP_403_FORBIDDEN
-            )
-        profile = user.profile
-        try:
-            recipe = Recipe.objects.get(slug=slug)
-        except Exception:
-            return Response(
-                {"Error": "Recipe is not found."}, status=status.HTTP_404_NOT_FOUND
-            )
-        if profile in recipe.liked_by.all():
-            recipe.liked_by.remove(profile)
-        else:
-            recipe.liked_by.add(profile)
-        return Response({"Error": "Success."}, status=status.HTTP_200_OK)
+        return self.set_relation(request, slug, True)
+
+    @swagger_auto_schema(
+        tags=["Recipes"],
+        operation_description="Этот эндпоинт предоставляет "
+        "возможность убрать лайк с рецепта. "
+        "Повторный запрос ничего не меняет.",
+        responses={
+            200: "Success.",
+            403: "User is not verified.",
+            404: "Recipe is not found.",
+        },
+    )
+    def delete(self, request, slug, *args, **kwargs):
+        return self.set_relation(request, slug, False)
 
 
-class SearchRecipesAPIView(ListAPIView):
+class SearchRecipesAPIView(APIView):
     permission_classes = [IsAuthenticated]
-    search_fields = ["name"]
-    filter_backends = (filters.SearchFilter,)
 
     @swagger_auto_schema(
         tags=["Recipes"],
         operation_description="Этот эндпоинт предоставляет "
-        "возможность найти рецепт по названию. ",
+        "возможность найти рецепт по названию, "
+        "описанию и ингредиентам. ",
         manual_parameters=search_recipe_swagger["parameters"],
         responses={
             200: search_recipe_swagger["response"],
         },
     )
     def get(self, request, *args, **kwargs):
-        queryset = Recipe.objects.all()
-        queryset = self.filter_queryset(queryset)
-        data = get_paginated_data(queryset, request)
-        return Response(data, status=status.HTTP_200_OK)
+        queryset, ordering = search_recipes(
+            Recipe.objects.all(), request.query_params.get("search", "")
+        )
+        build, validators = prepare_paginated_data(queryset, request, ordering)
+        return conditional_get(request, build, **validators)
+
+
+class RecipesByIngredientsAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        tags=["Recipes"],
+        operation_description="Этот эндпоинт предоставляет "
+        "возможность найти рецепты, которые "
+        "можно приготовить из указанных ингредиентов. ",
+        manual_parameters=recipes_by_ingredients_swagger["parameters"],
+        responses={
+            200: recipes_by_ingredients_swagger["response"],
+            400: "Ingredients are required.",
+        },
+    )
+    def get(self, request, *args, **kwargs):
+        names = [
+            name.strip()
+            for value in request.query_params.getlist("ingredients")
+            for name in value.split(",")
+            if name.strip()
+        ]
+        if not names:
+            return Response(
+                {"Error": "Ingredients are required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        ranked = find_recipes_by_ingredients(names, get_page_limit(request))
+        extra = {
+            recipe_id: {
+                "matched": matched,
+                "required": required,
+                "missing": required - matched,
+                "coverage": round(matched / required, 3),
+            }
+            for recipe_id, matched, required in ranked
+        }
+        build, validators = prepare_ranked_recipes_data(list(extra), request, extra)
+        return conditional_get(request, build, **validators)
+
+
+class FeedAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        tags=["Recipes"],
+        operation_description="Этот эндпоинт предоставляет "
+        "возможность получить ленту рецептов "
+        "от отслеживаемых пользователей. ",
+        manual_parameters=feed_swagger["parameters"],
+        responses={200: feed_swagger["response"]},
+    )
+    def get(self, request, *args, **kwargs):
+        recipe_ids, next_cursor = get_feed_page(
+            request.user.profile.id,
+            request.query_params.get("cursor"),
+            get_page_limit(request),
+        )
+        build, validators = prepare_ranked_recipes_data(
+            recipe_ids, request, meta={"next": next_cursor}
+        )
+        return conditional_get(request, build, **validators)
+
+
+class TrendingRecipesAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        tags=["Recipes"],
+        operation_description="Этот эндпоинт предоставляет "
+        "возможность получить популярные "
+        "рецепты определенной категории. ",
+        manual_parameters=trending_swagger["parameters"],
+        responses={200: trending_swagger["response"]},
+    )
+    def get(self, request, *args, **kwargs):
+        category = request.query_params.get("category", "Breakfast")
+        recipe_ids = get_trending_recipe_ids(category, get_page_limit(request))
+        build, validators = prepare_ranked_recipes_data(recipe_ids, request)
+        return conditional_get(request, build, **validators)
@@ -0,0 +1,47 @@
+from utils.cache import bump_versions, get_cache_stats, get_or_compute, get_version
+from utils.deferred import OnCommitBatch
+from utils.local_cache import LocalCache, publish_invalidation
+
+PROFILE_TIMEOUT = 60 * 60
+
+profile_stats = get_cache_stats("profile")
+profile_headers = LocalCache("profile_headers", max_size=5000, timeout=60)
+
+
+def profile_version_key(profile_id):
+    return f"profile:{profile_id}:version"
+
+
+def get_profile_version(profile_id):
+    return get_version(profile_version_key(profile_id))
+
+
+def get_cached_profile(profile_id, version, compute):
+    """
+    Returns the viewer-independent part of the profile payload for the
+    given profile version.
+    """
+    key = f"profile:{profile_id}:detail:{version}"
+    return get_or_compute(key, compute, PROFILE_TIMEOUT, stats=profile_stats)
+
+
+def get_profile_header(profile_id, compute):
+    """
+    ``(version, payload)`` of the profile, served from the worker's local
+    cache while no invalidation for it has arrived.
+    """
+
+    def load():
+        version = get_profile_version(profile_id)
+        return version, get_cached_profile(profile_id, version, compute)
+
+    return profile_headers.get_or_set(profile_id, load)
+
+
+def _invalidate_pending(pending):
+    bump_versions(profile_version_key(pk) for pk in pending)
+    for pk in pending:
+        publish_invalidation("profile_headers", pk)
+
+
+schedule_profile_invalidation = OnCommitBatch(_invalidate_pending).add
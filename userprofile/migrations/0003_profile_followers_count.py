@@ -0,0 +1,35 @@
+# Generated by Django 4.2.10 on 2026-10-18 12:51
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_followers_count(apps, schema_editor):
+    UserProfile = apps.get_model("userprofile", "UserProfile")
+    Follow = UserProfile.following.through
+    counts = (
+        Follow.objects.filter(to_userprofile=OuterRef("pk"))
+        .order_by()
+        .values("to_userprofile")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    UserProfile.objects.update(
+        followers_count=Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("userprofile", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userprofile",
+            name="followers_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_followers_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.10 on 2026-10-18 16:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("userprofile", "0003_profile_followers_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userprofile",
+            name="profile_picture_variants",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -16,9 +16,11 @@ class UserProfile(models.Model):
     profile_picture = models.ImageField(
         upload_to="cookscorner/user_profile", blank=True, null=True, max_length=500
     )
+    profile_picture_variants = models.JSONField(default=dict, blank=True)
     following = models.ManyToManyField(
         "self", symmetrical=False, related_name="followers", blank=True
     )
+    followers_count = models.PositiveIntegerField(default=0)
     slug = AutoSlugField(populate_from="username", unique=True, always_update=True)
 
     def __str__(self):
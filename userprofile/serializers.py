@@ -1,37 +1,59 @@
 from rest_framework import serializers
 
+from utils.images import card_url, variant_urls
+from utils.uploads import resolve_upload_key
+
 from .models import UserProfile
 
 
 class ProfileSerializer(serializers.ModelSerializer):
+    profile_picture_key = serializers.CharField(write_only=True, required=False)
+
     class Meta:
         model = UserProfile
-        fields = ["username", "bio", "profile_picture", "slug"]
+        fields = ["username", "bio", "profile_picture", "profile_picture_key", "slug"]
         read_only_fields = ("slug",)
         extra_kwargs = {
             "bio": {"required": False, "allow_null": True},
         }
 
+    def validate(self, attrs):
+        key = attrs.pop("profile_picture_key", None)
+        if key:
+            upload_to = UserProfile._meta.get_field("profile_picture").upload_to
+            attrs["profile_picture"] = resolve_upload_key(
+                key, upload_to, self.context["user"]
+            )
+        return attrs
+
     def update(self, instance, validated_data):
         instance.username = validated_data.get("username", instance.username)
         instance.bio = validated_data.get("bio", instance.bio)
-        instance.profile_picture = validated_data.get(
-            "profile_picture", instance.profile_picture
-        )
+        if "profile_picture" in validated_data:
+            instance.profile_picture = validated_data["profile_picture"]
         instance.save()
         return instance
 
     def to_representation(self, instance):
         representation = super().to_representation(instance)
         if self.context["detail"]:
-            representation["followers"] = instance.followers.count()
+            representation["followers"] = instance.followers_count
             representation["following"] = instance.following.count()
             representation["recipes"] = instance.recipes.count()
-            representation["is_followed"] = instance.followers.filter(
-                user=self.context["user"]
-            ).exists()
+            if hasattr(instance, "is_followed"):
+                representation["is_followed"] = instance.is_followed
+            else:
+                representation["is_followed"] = instance.followers.filter(
+                    user=self.context["user"]
+                ).exists()
             if self.context["me"]:
                 representation["isVerified"] = instance.user.is_verified
+            representation["profile_picture_variants"] = variant_urls(
+                instance.profile_picture_variants, instance.profile_picture.name
+            )
         else:
             representation.pop("bio")
+            representation["profile_picture"] = card_url(
+                instance.profile_picture_variants, instance.profile_picture
+            )
         return representation
@@ -1,14 +1,76 @@
-from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef
 
+from .cache import get_profile_header
+from .models import UserProfile
+from .signals import following_changed
 from .serializers import ProfileSerializer
+from utils.conditional import make_etag
+from utils.pagination import paginate
+from utils.relations import add_relation, remove_relation
+
+PROFILE_ORDERING = ("id",)
 
 
 def get_paginated_data(queryset, request):
-    page_number = int(request.query_params.get("page", 1))
-    page_limit = int(request.query_params.get("limit", 10))
-    paginator = Paginator(queryset, page_limit)
-    serializer = ProfileSerializer(
-        paginator.page(page_number), many=True, context={"detail": False}
-    )
-    data = {"data": serializer.data, "total": paginator.num_pages}
+    profiles, meta = paginate(queryset, request, PROFILE_ORDERING)
+    serializer = ProfileSerializer(profiles, many=True, context={"detail": False})
+    data = {"data": serializer.data, **meta}
     return data
+
+
+def prepare_profile_data(request, slug=None):
+    """
+    Returns ``(build, validators)`` for a profile, or for the requesting
+    user's own profile without ``slug``. The ETag combines the profile's
+    cache version, bumped on every change of what the payload shows, with
+    the viewer's state.
+    """
+    user = request.user
+    me = slug is None
+    followed = UserProfile.following.through.objects.filter(
+        to_userprofile=OuterRef("pk"), from_userprofile__user=user
+    )
+    queryset = UserProfile.objects.annotate(is_followed=Exists(followed))
+    profile = queryset.get(user=user) if me else queryset.get(slug=slug)
+    viewer = {"is_followed": profile.is_followed}
+    if me:
+        viewer["isVerified"] = user.is_verified
+
+    def compute():
+        serializer = ProfileSerializer(
+            profile, context={"detail": True, "user": user, "me": False}
+        )
+        data = dict(serializer.data)
+        data.pop("is_followed")
+        return data
+
+    version, payload = get_profile_header(profile.pk, compute)
+    etag = make_etag("profile", profile.pk, version, viewer)
+
+    def build():
+        return {**payload, **viewer}
+
+    return build, {"etag": etag}
+
+
+def set_following(profile_id, target_id, value):
+    field = UserProfile._meta.get_field("following")
+    with transaction.atomic():
+        if value:
+            changed = add_relation(field, profile_id, target_id)
+            delta = 1
+        else:
+            changed = remove_relation(field, profile_id, target_id)
+            delta = -1
+        if changed:
+            UserProfile.objects.filter(pk=target_id).update(
+                followers_count=F("followers_count") + delta
+            )
+            following_changed.send(
+                sender=UserProfile,
+                profile_id=profile_id,
+                target_id=target_id,
+                value=value,
+            )
+    return changed
@@ -0,0 +1,21 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .cache import schedule_profile_invalidation
+from .models import UserProfile
+
+# Sent with profile_id, target_id and value (True when followed) whenever a
+# follow relation actually changes.
+following_changed = Signal()
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_profile(sender, instance, **kwargs):
+    schedule_profile_invalidation(instance.pk)
+
+
+@receiver(following_changed)
+def invalidate_follow_profiles(sender, profile_id, target_id, **kwargs):
+    schedule_profile_invalidation(profile_id)
+    schedule_profile_invalidation(target_id)
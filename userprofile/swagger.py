@@ -6,6 +6,7 @@ class MyProfileRequestSerializer(serializers.Serializer):
     username = serializers.CharField()
     bio = serializers.CharField()
     profile_picture = serializers.ImageField()
+    profile_picture_key = serializers.CharField()
 
     class Meta:
         abstract = True
@@ -17,6 +18,9 @@ class ProfileDetailSerializer(MyProfileRequestSerializer):
     following = serializers.IntegerField()
     is_followed = serializers.BooleanField()
     recipes = serializers.IntegerField()
+    profile_picture_variants = serializers.DictField(
+        child=serializers.DictField(child=serializers.URLField())
+    )
 
 
 class MyProfileResponseSerializer(ProfileDetailSerializer):
@@ -32,6 +36,22 @@ class ProfileListSerializer(serializers.Serializer):
         abstract = True
 
 
+class UploadTicketSerializer(serializers.Serializer):
+    url = serializers.URLField()
+    fields = serializers.DictField()
+    key = serializers.CharField()
+    expires_at = serializers.IntegerField()
+
+    class Meta:
+        abstract = True
+
+
+upload_ticket_swagger = {
+    "parameters": None,
+    "request_body": None,
+    "response": UploadTicketSerializer,
+}
+
 user_detail_swagger = {
     "parameters": None,
     "request_body": None,
@@ -5,6 +5,7 @@ from .views import (
     UserFollowAPIView,
     SearchUsersAPIView,
     MyProfileAPIView,
+    ProfileUploadTicketAPIView,
 )
 
 urlpatterns = [
@@ -20,4 +21,9 @@ urlpatterns = [
     ),
     path("search/", SearchUsersAPIView.as_view(), name="cookscorner-search-users"),
     path("myprofile/", MyProfileAPIView.as_view(), name="cookscorner-myprofile"),
+    path(
+        "upload-ticket/",
+        ProfileUploadTicketAPIView.as_view(),
+        name="cookscorner-profile-upload-ticket",
+    ),
 ]
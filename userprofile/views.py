@@ -6,12 +6,15 @@ from drf_yasg.utils import swagger_auto_schema
 
 from .serializers import ProfileSerializer
 from .models import UserProfile
-from .services import get_paginated_data
+from .services import get_paginated_data, prepare_profile_data, set_following
 from .swagger import (
     search_user_swagger,
     user_detail_swagger,
     myprofile_swagger,
+    upload_ticket_swagger,
 )
+from utils.conditional import conditional_get
+from utils.uploads import UploadTicketAPIView
 # Create your views here.
 
 
@@ -24,14 +27,14 @@ class MyProfileAPIView(APIView):
         "возможность получить "
         "подробную информацию "
         "о себе.",
-        responses={200: myprofile_swagger["response"]},
+        responses={
+            200: myprofile_swagger["response"],
+            304: "User profile is not modified.",
+        },
     )
     def get(self, request, *args, **kwargs):
-        profile = request.user.profile
-        serializer = ProfileSerializer(
-            profile, context={"detail": True, "user": request.user, "me": True}
-        )
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        build, validators = prepare_profile_data(request)
+        return conditional_get(request, build, **validators)
 
     @swagger_auto_schema(
         tags=["User profile"],
@@ -68,63 +71,77 @@ class UserProfileAPIView(APIView):
         "о пользователе по slug. ",
         responses={
             200: user_detail_swagger["response"],
+            304: "User profile is not modified.",
             404: "User profile is not found.",
         },
     )
     def get(self, request, slug, *args, **kwargs):
         try:
-            profile = UserProfile.objects.get(slug=slug)
+            build, validators = prepare_profile_data(request, slug)
         except Exception:
             return Response(
                 {"Error": "User profile is not found."},
                 status=status.HTTP_404_NOT_FOUND,
             )
-        serializer = ProfileSerializer(
-            profile, context={"detail": True, "user": request.user, "me": False}
-        )
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return conditional_get(request, build, **validators)
 
 
 class UserFollowAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
-    @swagger_auto_schema(
-        tags=["User profile"],
-        operation_description="Этот эндпоинт предоставляет "
-        "возможность начать "
-        "отслежить другого "
-        "пользователя.",
-        responses={
-            200: "Success.",
-            400: "You can't follow yourself",
-            403: "User is not verified.",
-            404: "User profile is not found.",
-        },
-    )
-    def put(self, request, slug, *args, **kwargs):
+    def set_following(self, request, slug, value):
         user = request.user
         if not user.is_verified:
             return Response(
                 {"Error": "User is not verified."}, status=status.HTTP_403_FORBIDDEN
             )
-        try:
-            profile = UserProfile.objects.get(slug=slug)
-        except Exception:
+        profile_id = UserProfile.objects.filter(slug=slug).values_list("pk", flat=True)
+        profile_id = profile_id.first()
+        if profile_id is None:
             return Response(
                 {"Error": "User profile is not found."},
                 status=status.HTTP_404_NOT_FOUND,
             )
-        if user.profile == profile:
+        if user.profile.id == profile_id:
             return Response(
                 {"Error": "You can't follow yourself"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        if profile in user.profile.following.all():
-            user.profile.following.remove(profile)
-        else:
-            user.profile.following.add(profile)
+        set_following(user.profile.id, profile_id, value)
         return Response({"Message": "Success."}, status=status.HTTP_200_OK)
 
+    @swagger_auto_schema(
+        tags=["User profile"],
+        operation_description="Этот эндпоинт предоставляет "
+        "возможность начать "
+        "отслеживать другого "
+        "пользователя. Повторный запрос ничего не меняет.",
+        responses={
+            200: "Success.",
+            400: "You can't follow yourself",
+            403: "User is not verified.",
+            404: "User profile is not found.",
+        },
+    )
+    def put(self, request, slug, *args, **kwargs):
+        return self.set_following(request, slug, True)
+
+    @swagger_auto_schema(
+        tags=["User profile"],
+        operation_description="Этот эндпоинт предоставляет "
+        "возможность перестать "
+        "отслеживать другого "
+        "пользователя. Повторный запрос ничего не меняет.",
+        responses={
+            200: "Success.",
+            400: "You can't follow yourself",
+            403: "User is not verified.",
+            404: "User profile is not found.",
+        },
+    )
+    def delete(self, request, slug, *args, **kwargs):
+        return self.set_following(request, slug, False)
+
 
 class SearchUsersAPIView(ListAPIView):
     permission_classes = [IsAuthenticated]
@@ -145,3 +162,18 @@ class SearchUsersAPIView(ListAPIView):
         queryset = self.filter_queryset(queryset)
         data = get_paginated_data(queryset, request)
         return Response(data, status=status.HTTP_200_OK)
+
+
+class ProfileUploadTicketAPIView(UploadTicketAPIView):
+    upload_to = UserProfile._meta.get_field("profile_picture").upload_to
+
+    @swagger_auto_schema(
+        tags=["User profile"],
+        operation_description="Этот эндпоинт выдает "
+        "подписанный билет для загрузки "
+        "фото профиля напрямую в хранилище. "
+        "Полученный key передается в profile_picture_key.",
+        responses={201: upload_ticket_swagger["response"]},
+    )
+    def post(self, request, *args, **kwargs):
+        return super().post(request, *args, **kwargs)
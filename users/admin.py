@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from .forms import UserCreationForm, UserChangeForm
-from .models import User, ConfirmationCode
+from .models import User, ConfirmationCode, OutgoingEmail
 
 
 class UserAdmin(UserAdmin):
@@ -32,3 +32,12 @@ class UserAdmin(UserAdmin):
 
 admin.site.register(User, UserAdmin)
 admin.site.register(ConfirmationCode)
+
+
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ("to_email", "subject", "status", "attempts", "next_attempt_at")
+    list_filter = ("status",)
+    search_fields = ("to_email",)
+
+
+admin.site.register(OutgoingEmail, OutgoingEmailAdmin)
@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.template import loader
+from django.utils import translation
+
+EMAIL_FORMATS = ("txt", "html")
+
+_templates = {}
+
+
+def _template_names(name, extension, locale):
+    # "ru-ru" looks for users/email.ru-ru.html, then users/email.ru.html and
+    # falls back to users/email.html.
+    names = [f"{name}.{locale}.{extension}"]
+    if "-" in locale:
+        names.append(f"{name}.{locale.split('-')[0]}.{extension}")
+    names.append(f"{name}.{extension}")
+    return names
+
+
+def get_email_templates(name, locale=None):
+    """
+    Returns the compiled (text, html) templates of the email ``name`` for
+    ``locale``. Lookup and compilation happen once per process.
+    """
+    locale = (locale or translation.get_language() or settings.LANGUAGE_CODE).lower()
+    key = (name, locale)
+    templates = _templates.get(key)
+    if templates is None:
+        templates = tuple(
+            loader.select_template(_template_names(name, extension, locale))
+            for extension in EMAIL_FORMATS
+        )
+        _templates[key] = templates
+    return templates
+
+
+def render_email(name, context, locale=None):
+    text, html = get_email_templates(name, locale)
+    return text.render(context), html.render(context)
+
+
+def clear_email_templates():
+    _templates.clear()
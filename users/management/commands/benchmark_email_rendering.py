@@ -0,0 +1,62 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.template import Context, Engine, engines
+
+from users.emails import _template_names, clear_email_templates, render_email
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare rendering emails with templates loaded and compiled per "
+        "message against the cached email renderer."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=5000)
+        parser.add_argument("--template", default="users/email")
+        parser.add_argument("--locale", default="en")
+
+    def handle(self, *args, **options):
+        name = options["template"]
+        locale = options["locale"]
+        count = options["messages"]
+        contexts = [
+            {"link_app": f"https://example.com/verify/?token={i:08d}"}
+            for i in range(count)
+        ]
+
+        # The same lookup without the cached loader, as with the default
+        # loaders in DEBUG before Django 4.1.
+        engine = engines["django"].engine
+        uncached = Engine(
+            dirs=engine.dirs,
+            loaders=[
+                "django.template.loaders.filesystem.Loader",
+                "django.template.loaders.app_directories.Loader",
+            ],
+        )
+        started = time.perf_counter()
+        for context in contexts:
+            for extension in ("txt", "html"):
+                template = uncached.select_template(
+                    _template_names(name, extension, locale)
+                )
+                template.render(Context(context))
+        uncached_time = time.perf_counter() - started
+
+        clear_email_templates()
+        started = time.perf_counter()
+        for context in contexts:
+            render_email(name, context, locale)
+        cached_time = time.perf_counter() - started
+
+        self.stdout.write(f"Rendered {count} messages (text and HTML each)")
+        self.stdout.write(
+            f"Compiled per message: {uncached_time:.2f}s, "
+            f"{count / uncached_time:.0f} messages/s"
+        )
+        self.stdout.write(
+            f"Cached renderer:      {cached_time:.2f}s, "
+            f"{count / cached_time:.0f} messages/s"
+        )
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.tokens import PRUNE_BATCH_SIZE, prune_expired_tokens
+
+
+class Command(BaseCommand):
+    help = "Delete expired outstanding and blacklisted tokens in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=PRUNE_BATCH_SIZE)
+        parser.add_argument(
+            "--loop", action="store_true", help="Keep pruning as tokens expire."
+        )
+        parser.add_argument("--sleep", type=float, default=60.0)
+
+    def handle(self, *args, **options):
+        deleted = 0
+        while True:
+            pruned = prune_expired_tokens(options["batch_size"])
+            deleted += pruned
+            if pruned:
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["sleep"])
+        self.stdout.write(f"Pruned {deleted} expired tokens.")
@@ -0,0 +1,35 @@
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from users.outbox import OUTBOX_BATCH_SIZE, send_outbox_batch
+
+
+class Command(BaseCommand):
+    help = "Deliver queued emails in batches over one SMTP connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=OUTBOX_BATCH_SIZE)
+        parser.add_argument(
+            "--loop", action="store_true", help="Keep polling for new emails."
+        )
+        parser.add_argument("--sleep", type=float, default=1.0)
+
+    def handle(self, *args, **options):
+        connection = get_connection(fail_silently=False)
+        processed = 0
+        try:
+            while True:
+                claimed = send_outbox_batch(connection, options["batch_size"])
+                processed += claimed
+                if claimed:
+                    continue
+                if not options["loop"]:
+                    break
+                # Don't keep an idle session open for the relay to drop.
+                connection.close()
+                time.sleep(options["sleep"])
+        finally:
+            connection.close()
+        self.stdout.write(f"Processed {processed} emails.")
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.10 on 2026-10-18 16:20
+
+import jwt
+from django.conf import settings
+from django.db import migrations
+
+
+def prune_expired_codes(apps, schema_editor):
+    # Links are signed now; stored codes are only kept until they expire so
+    # emails sent before the upgrade still work.
+    for name in ("ConfirmationCode", "ChangePasswordCode"):
+        model = apps.get_model("users", name)
+        expired = []
+        for pk, code in model.objects.values_list("pk", "code").iterator():
+            try:
+                jwt.decode(code, settings.SECRET_KEY, algorithms="HS256")
+            except jwt.PyJWTError:
+                expired.append(pk)
+        model.objects.filter(pk__in=expired).delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(prune_expired_codes, migrations.RunPython.noop),
+    ]
@@ -2,6 +2,7 @@
 from uuid import uuid4
 
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import (
     BaseUserManager,
     AbstractBaseUser,
@@ -58,3 +59,37 @@ class ChangePasswordCode(models.Model):
 
     def __str__(self):
         return self.user.email + "'s password change code"
+
+
+EMAIL_STATUS_CHOICES = (
+    ("Pending", "Pending"),
+    ("Sent", "Sent"),
+    ("Dead", "Dead"),
+)
+
+
+class OutgoingEmail(models.Model):
+    """
+    Email waiting in the outbox. Requests only insert rows here, the
+    send_outbox_emails command delivers them; ``next_attempt_at`` is pushed
+    back while a worker holds the message and after every failure.
+    """
+
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+    html = models.TextField(blank=True)
+    status = models.CharField(
+        max_length=10, choices=EMAIL_STATUS_CHOICES, default="Pending"
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
+
+    def __str__(self):
+        return f"{self.subject} to {self.to_email} ({self.status})"
@@ -0,0 +1,88 @@
+import logging
+from datetime import timedelta
+
+from django.core.mail import EmailMultiAlternatives
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_MAX_ATTEMPTS = 8
+OUTBOX_RETRY_DELAY = timedelta(seconds=30)
+OUTBOX_MAX_RETRY_DELAY = timedelta(hours=1)
+# A claimed message becomes due again after this long, so a worker that
+# dies mid-batch does not lose it.
+OUTBOX_CLAIM_TIMEOUT = timedelta(minutes=5)
+
+
+def enqueue_email(to_email, subject, html="", body=""):
+    return OutgoingEmail.objects.create(
+        to_email=to_email, subject=subject, html=html, body=body
+    )
+
+
+def retry_delay(attempts):
+    return min(OUTBOX_RETRY_DELAY * 2 ** (attempts - 1), OUTBOX_MAX_RETRY_DELAY)
+
+
+def claim_emails(batch_size=OUTBOX_BATCH_SIZE):
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(status="Pending", next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "pk")[:batch_size]
+        )
+        OutgoingEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+            next_attempt_at=now + OUTBOX_CLAIM_TIMEOUT
+        )
+    return emails
+
+
+def build_message(email, connection):
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        to=[email.to_email],
+        connection=connection,
+    )
+    if email.html:
+        message.attach_alternative(email.html, "text/html")
+    return message
+
+
+def _record_failure(email, error):
+    email.attempts += 1
+    email.last_error = f"{type(error).__name__}: {error}"
+    if email.attempts >= OUTBOX_MAX_ATTEMPTS:
+        email.status = "Dead"
+        logger.error("Giving up on email %s: %s", email.pk, email.last_error)
+    else:
+        email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+    email.save(update_fields=["attempts", "last_error", "status", "next_attempt_at"])
+
+
+def send_outbox_batch(connection, batch_size=OUTBOX_BATCH_SIZE):
+    """
+    Delivers the next batch of due emails over ``connection``, which stays
+    open between batches. Returns the number of emails claimed.
+    """
+    emails = claim_emails(batch_size)
+    sent = []
+    for email in emails:
+        try:
+            connection.open()
+            connection.send_messages([build_message(email, connection)])
+        except Exception as error:
+            # The session may be unusable now; reconnect for the next one.
+            connection.close()
+            _record_failure(email, error)
+        else:
+            sent.append(email.pk)
+    OutgoingEmail.objects.filter(pk__in=sent).update(
+        status="Sent", sent_at=timezone.now(), last_error=""
+    )
+    return len(emails)
@@ -1,7 +1,12 @@
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
+from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
+from rest_framework_simplejwt import serializers as jwt_serializers
+from rest_framework_simplejwt.exceptions import TokenError
+
 from .models import User
+from .tokens import RefreshToken
 
 
 class SignupSerializer(serializers.Serializer):
@@ -40,3 +45,23 @@ class ChangePasswordSerializer(serializers.Serializer):
             raise ValidationError("Passwords don't match.")
         validate_password(data["new_password"])
         return data
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    token_class = RefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        data = {"access": str(refresh.access_token)}
+
+        # Blacklisting is the atomic step: of two concurrent requests with the
+        # same token only one creates the row, the other one is a replay.
+        created = refresh.blacklist()[1]
+        if not created:
+            raise TokenError(_("Token is blacklisted"))
+
+        refresh.set_jti()
+        refresh.set_exp()
+        refresh.set_iat()
+        data["refresh"] = str(refresh)
+        return data
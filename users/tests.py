@@ -1,3 +1,195 @@
+import os
+import re
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.core import mail
+from django.core.exceptions import ValidationError
+from django.core.mail import get_connection
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+from rest_framework_simplejwt.tokens import AccessToken
+
+from userprofile.models import UserProfile
+
+from .emails import get_email_templates, render_email
+from .models import ConfirmationCode, OutgoingEmail, User
+from .outbox import OUTBOX_MAX_ATTEMPTS, enqueue_email, send_outbox_batch
+from .users_services import get_user_by_email_token, make_email_token
+from .tokens import RefreshToken, prune_expired_tokens, revoked_tokens
+
+
+class CachedJWTAuthenticationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="token@example.com", password="Token123!"
+        )
+        self.profile = UserProfile.objects.create(user=self.user, username="Token")
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+        self.url = reverse("cookscorner-saved-recipes") + "?cursor="
+
+    def test_warm_cache_needs_no_user_queries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(self.url)
+        # Only the page of saved recipes is read.
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_user_deletion_invalidates_cache(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 401)
+
+
+class RefreshTokenRevocationTest(TestCase):
+    def setUp(self):
+        revoked_tokens.reset()
+        self.user = User.objects.create_user(
+            email="refresh@example.com", password="Refresh123!"
+        )
+        self.url = reverse("cookscorner-login-refresh")
+
+    def test_replayed_refresh_token_is_rejected(self):
+        token = RefreshToken.for_user(self.user)
+        refresh = str(token)
+        response = self.client.post(self.url, {"refresh": refresh})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.json()["refresh"], refresh)
+        # The in-memory set has not seen the rotation yet; the blacklist
+        # insert still catches the replay.
+        self.assertNotIn(token["jti"], revoked_tokens)
+        response = self.client.post(self.url, {"refresh": refresh})
+        self.assertEqual(response.status_code, 401)
+
+    def test_blacklist_check_is_served_from_memory(self):
+        token = RefreshToken.for_user(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            token.blacklist()
+        revoked_tokens.refresh(force=True)
+        with self.assertNumQueries(0):
+            response = self.client.post(self.url, {"refresh": str(token)})
+        self.assertEqual(response.status_code, 401)
+
+    def test_prune_deletes_expired_tokens_only(self):
+        expired = RefreshToken.for_user(self.user)
+        expired.blacklist()
+        RefreshToken.for_user(self.user)
+        OutstandingToken.objects.filter(jti=expired["jti"]).update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(prune_expired_tokens(), 1)
+        self.assertEqual(OutstandingToken.objects.count(), 1)
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+
+class EmailTokenTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="mail@example.com", password="Mail1234!"
+        )
+
+    def test_verification_reads_only_the_user(self):
+        token = make_email_token(self.user, "verify-account")
+        url = reverse("cookscorner-email-verify")
+        # One read of the user and the update of is_verified.
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {"token": token})
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_verified)
+        response = self.client.get(url, {"token": token})
+        self.assertEqual(response.status_code, 400)
+
+    def test_reset_token_is_single_use(self):
+        token = make_email_token(self.user, "change-password")
+        url = reverse("cookscorner-forgot-password-change") + f"?token={token}"
+        data = {"password": "Changed123!", "password_confirm": "Changed123!"}
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 400)
+
+    def test_token_is_bound_to_its_purpose(self):
+        token = make_email_token(self.user, "verify-account")
+        with self.assertRaises(ValidationError):
+            get_user_by_email_token(token, "change-password")
+
+    def test_stored_legacy_code_is_accepted_once(self):
+        token = str(AccessToken.for_user(self.user))
+        ConfirmationCode.objects.create(user=self.user, code=token)
+        self.assertEqual(get_user_by_email_token(token, "verify-account"), self.user)
+        with self.assertRaises(ValidationError):
+            get_user_by_email_token(token, "verify-account")
+
+
+class EmailOutboxTest(TestCase):
+    def setUp(self):
+        self.connection = get_connection()
+
+    @mock.patch.dict(os.environ, {"EMAIL_LINK": "https://cookscorner.test/?token="})
+    def test_signup_only_enqueues(self):
+        data = {
+            "username": "Outbox",
+            "email": "outbox@example.com",
+            "password": "Outbox123!",
+            "password_confirm": "Outbox123!",
+        }
+        response = self.client.post(reverse("cookscorner-signup"), data)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.to_email, "outbox@example.com")
+        link = re.compile(r"https://cookscorner\.test/\?token=([^\s\"<]+)")
+        token = link.search(email.body).group(1)
+        self.assertEqual(link.search(email.html).group(1), token)
+        user = get_user_by_email_token(token, "verify-account")
+        self.assertEqual(user.email, "outbox@example.com")
+
+    def test_batch_is_sent_over_one_connection(self):
+        for i in range(3):
+            enqueue_email(f"user{i}@example.com", "Subject", html="<p>Hi</p>")
+        self.assertEqual(send_outbox_batch(self.connection), 3)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(OutgoingEmail.objects.filter(status="Sent").count(), 3)
+        self.assertEqual(send_outbox_batch(self.connection), 0)
+
+    def test_failures_are_retried_then_dead_lettered(self):
+        email = enqueue_email("retry@example.com", "Subject", body="Hi")
+        with mock.patch.object(
+            self.connection, "send_messages", side_effect=OSError("refused")
+        ):
+            for attempt in range(OUTBOX_MAX_ATTEMPTS):
+                OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+                send_outbox_batch(self.connection)
+                email.refresh_from_db()
+                self.assertEqual(email.attempts, attempt + 1)
+        self.assertEqual(email.status, "Dead")
+        self.assertIn("refused", email.last_error)
+        OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(send_outbox_batch(self.connection), 0)
+
+
+class EmailRenderingTest(TestCase):
+    def test_templates_are_compiled_once_per_locale(self):
+        templates = get_email_templates("users/email", "de-de")
+        self.assertIs(get_email_templates("users/email", "de-de"), templates)
+        self.assertEqual(templates[1].origin.template_name, "users/email.html")
 
-# Create your tests here.
+    def test_text_and_html_share_the_context(self):
+        body, html = render_email("users/forgot_password", {"link_app": "x?t=<1>"})
+        self.assertIn("x?t=<1>", body)
+        self.assertIn("x?t=&lt;1&gt;", html)
@@ -0,0 +1,125 @@
+import hashlib
+import threading
+import time
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+
+REVOCATION_REFRESH_INTERVAL = 2
+# Rows are re-read for this long after their insert, so a blacklisting
+# committed late (with an older timestamp) is still picked up.
+REVOCATION_LOOKBACK = timedelta(minutes=1)
+
+
+def _jti_hash(jti):
+    return int.from_bytes(hashlib.blake2b(jti.encode(), digest_size=8).digest(), "big")
+
+
+class RevocationSet:
+    """
+    In-memory set of the hashes of blacklisted refresh tokens that have not
+    expired yet. It is loaded once and then refreshed incrementally at most
+    every REVOCATION_REFRESH_INTERVAL seconds, so checking a token does not
+    query the blacklist.
+    """
+
+    def __init__(self, refresh_interval=REVOCATION_REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self._expires = {}
+        self._lock = threading.Lock()
+        self._checked_at = None
+        self._synced_at = None
+
+    def add(self, jti, exp):
+        with self._lock:
+            self._expires[_jti_hash(jti)] = exp
+
+    def __contains__(self, jti):
+        self.refresh()
+        return _jti_hash(jti) in self._expires
+
+    def __len__(self):
+        return len(self._expires)
+
+    def reset(self):
+        with self._lock:
+            self._expires.clear()
+            self._checked_at = self._synced_at = None
+
+    def refresh(self, force=False):
+        now = time.monotonic()
+        if not force and self._due(now) is False:
+            return
+        with self._lock:
+            if not force and self._due(now) is False:
+                return
+            started = timezone.now()
+            rows = BlacklistedToken.objects.filter(token__expires_at__gt=started)
+            if self._synced_at is not None:
+                rows = rows.filter(
+                    blacklisted_at__gte=self._synced_at - REVOCATION_LOOKBACK
+                )
+            rows = rows.values_list("token__jti", "token__expires_at")
+            for jti, expires_at in rows.iterator():
+                self._expires[_jti_hash(jti)] = expires_at.timestamp()
+            cutoff = started.timestamp()
+            self._expires = {
+                key: exp for key, exp in self._expires.items() if exp > cutoff
+            }
+            self._synced_at = started
+            self._checked_at = now
+
+    def _due(self, now):
+        return (
+            self._checked_at is None or now - self._checked_at >= self.refresh_interval
+        )
+
+
+revoked_tokens = RevocationSet()
+
+
+class RefreshToken(tokens.RefreshToken):
+    """
+    Refresh token whose blacklist check is answered from ``revoked_tokens``.
+    The authoritative check is ``blacklist()``: a token is only rotated once
+    because the blacklist row is unique per token.
+    """
+
+    def check_blacklist(self):
+        if self.payload[api_settings.JTI_CLAIM] in revoked_tokens:
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        blacklisted, created = super().blacklist()
+        jti = self.payload[api_settings.JTI_CLAIM]
+        exp = self.payload["exp"]
+        transaction.on_commit(lambda: revoked_tokens.add(jti, exp))
+        return blacklisted, created
+
+
+PRUNE_BATCH_SIZE = 1000
+
+
+def prune_expired_tokens(batch_size=PRUNE_BATCH_SIZE):
+    """
+    Deletes one batch of expired outstanding tokens; their blacklist rows go
+    with them. Expired tokens are rejected on their ``exp`` claim alone, so
+    the rows are no longer needed. Returns the number of tokens deleted.
+    """
+    ids = list(
+        OutstandingToken.objects.filter(expires_at__lte=timezone.now())
+        .order_by("pk")
+        .values_list("pk", flat=True)[:batch_size]
+    )
+    if ids:
+        OutstandingToken.objects.filter(pk__in=ids).delete()
+    return len(ids)
@@ -2,11 +2,28 @@ from datetime import timedelta
 import jwt
 
 from django.conf import settings
-from rest_framework_simplejwt.tokens import RefreshToken
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.utils.crypto import constant_time_compare, salted_hmac
 
 from .models import ConfirmationCode, ChangePasswordCode, User
+from .tokens import RefreshToken
 from .utils import EmailUtil
 
+EMAIL_TOKEN_MAX_AGE = timedelta(minutes=5)
+EMAIL_TOKEN_PURPOSES = {
+    "verify-account": {
+        "template": "users/email",
+        "email_subject": "Verify your email",
+        "legacy_model": ConfirmationCode,
+    },
+    "change-password": {
+        "template": "users/forgot_password",
+        "email_subject": "Change password",
+        "legacy_model": ChangePasswordCode,
+    },
+}
+
 
 def destroy_token(refresh_token):
     token = RefreshToken(refresh_token)
@@ -21,33 +38,65 @@ def get_tokens_for_user(user):
     }
 
 
-def get_user_by_token(token):
-    payload = jwt.decode(token, settings.SECRET_KEY, algorithms="HS256")
-    user = User.objects.get(id=payload["user_id"])
-    return user
+def _user_state(user, purpose):
+    # Verifying the email or changing the password changes the state, which
+    # makes every token issued before that unusable.
+    value = f"{user.pk}:{user.password}:{user.is_verified}"
+    return salted_hmac(purpose, value, algorithm="sha256").hexdigest()[:16]
+
+
+def make_email_token(user, purpose):
+    return signing.dumps(
+        {"id": user.pk, "state": _user_state(user, purpose)},
+        salt=f"users.email-token.{purpose}",
+        compress=False,
+    )
 
 
-def _create_or_change_code(user, token, model):
-    user_check = model.objects.filter(user=user).first()
-    if user_check is None:
-        model.objects.create(user=user, code=str(token))
-    else:
-        user_code = model.objects.get(user=user)
-        user_code.code = str(token)
-        user_code.save()
+def _get_user_by_legacy_token(token, purpose):
+    # Codes stored in the database before tokens became signed; they are
+    # short-lived JWTs, so this path only serves links sent before the
+    # upgrade.
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms="HS256")
+    except jwt.PyJWTError:
+        raise ValidationError("Invalid or expired token.")
+    model = EMAIL_TOKEN_PURPOSES[purpose]["legacy_model"]
+    code = (
+        model.objects.select_related("user")
+        .filter(user_id=payload.get("user_id"))
+        .first()
+    )
+    if code is None or not constant_time_compare(code.code, token):
+        raise ValidationError("Invalid or expired token.")
+    code.delete()
+    return code.user
+
+
+def get_user_by_email_token(token, purpose):
+    try:
+        payload = signing.loads(
+            token or "",
+            salt=f"users.email-token.{purpose}",
+            max_age=EMAIL_TOKEN_MAX_AGE,
+        )
+    except signing.SignatureExpired:
+        raise ValidationError("Invalid or expired token.")
+    except signing.BadSignature:
+        return _get_user_by_legacy_token(token, purpose)
+    user = User.objects.filter(pk=payload["id"]).first()
+    if user is None or not constant_time_compare(
+        payload["state"], _user_state(user, purpose)
+    ):
+        raise ValidationError("Invalid or expired token.")
+    return user
 
 
 def create_token_and_send_to_email(user, query, url):
-    token = RefreshToken().for_user(user).access_token
-    token.set_exp(lifetime=timedelta(minutes=5))
-    if query == "verify-account":
-        model = ConfirmationCode
-        html = "users/email.html"
-        email_subject = "Verify your email"
-    elif query == "change-password":
-        model = ChangePasswordCode
-        html = "users/forgot_password.html"
-        email_subject = "Change password"
-    _create_or_change_code(user, token, model)
-    data = {"token": str(token), "to_email": user.email, "email_subject": email_subject}
-    EmailUtil.send_email(data, url, html)
+    options = EMAIL_TOKEN_PURPOSES[query]
+    data = {
+        "token": make_email_token(user, query),
+        "to_email": user.email,
+        "email_subject": options["email_subject"],
+    }
+    EmailUtil.send_email(data, url, options["template"])
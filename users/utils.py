@@ -2,9 +2,7 @@ import re
 
 from django.db import models
 from django.core.exceptions import ValidationError
-from django.core.mail import EmailMultiAlternatives
 from django.utils.translation import gettext as _
-from django.template.loader import render_to_string
 
 
 # Overriding email field of the model
@@ -27,14 +25,14 @@ class EmailUtil:
     """
 
     @staticmethod
-    def send_email(data, url, html):
+    def send_email(data, url, template):
+        from .emails import render_email
+        from .outbox import enqueue_email
+
         context = {"link_app": "".join(url) + data["token"]}
-        html_content = render_to_string(html, context=context)
-        email = EmailMultiAlternatives(
-            subject=data["email_subject"], to=[data["to_email"]]
-        )
-        email.attach_alternative(html_content, "text/html")
-        email.send()
+        body, html = render_email(template, context)
+        # Delivered by the send_outbox_emails worker after the commit.
+        enqueue_email(data["to_email"], data["email_subject"], html=html, body=body)
 
 
 # Password Validators
@@ -1,4 +1,3 @@
-import jwt
 from decouple import config
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
@@ -10,10 +9,10 @@ from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
 from .serializers import SignupSerializer, ChangePasswordSerializer
-from .models import User, ConfirmationCode
+from .models import User
 from .users_services import (
     create_token_and_send_to_email,
-    get_user_by_token,
+    get_user_by_email_token,
     get_tokens_for_user,
     destroy_token,
 )
@@ -29,14 +28,11 @@ from .swagger import (
 from userprofile.models import UserProfile
 
 
-def handle_user_verification(user, token):
+def handle_user_verification(user):
     if user.is_verified:
         raise ValidationError("User is already verified.")
-    user_code = ConfirmationCode.objects.get(user=user)
-    if token != user_code.code:
-        raise ValidationError("Invalid or expired activation token.")
     user.is_verified = True
-    user.save()
+    user.save(update_fields=["is_verified"])
 
 
 def create_user_profile(user, username):
@@ -95,12 +91,8 @@ class VerifyEmailAPIView(APIView):
     def get(self, request):
         token = request.GET.get("token")
         try:
-            user = get_user_by_token(token)
-            handle_user_verification(user, token)
-        except jwt.exceptions.DecodeError:
-            return Response(
-                {"Error": "Invalid token"}, status=status.HTTP_400_BAD_REQUEST
-            )
+            user = get_user_by_email_token(token, "verify-account")
+            handle_user_verification(user)
         except ValidationError as e:
             return Response({"Error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         return Response(
@@ -291,7 +283,7 @@ class ForgotPasswordChangeAPIView(APIView):
     def post(self, request, *args, **kwargs):
         token = request.GET.get("token")
         try:
-            user = get_user_by_token(token)
+            user = get_user_by_email_token(token, "change-password")
             new_password = request.data.get("password")
             confirm_password = request.data.get("password_confirm")
             if new_password != confirm_password:
@@ -302,9 +294,5 @@ class ForgotPasswordChangeAPIView(APIView):
             return Response(
                 {"Message": "Password successfully changed."}, status=status.HTTP_200_OK
             )
-        except jwt.DecodeError:
-            return Response(
-                {"Error": "Invalid token"}, status=status.HTTP_400_BAD_REQUEST
-            )
         except ValidationError as e:
             return Response({"Error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,189 @@
+import math
+import os
+import random
+import threading
+import time
+
+from django.core.cache import cache
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .local_cache import all_local_cache_stats
+
+
+class CacheStats:
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def hit(self, count=1):
+        with self._lock:
+            self.hits += count
+
+    def miss(self, count=1):
+        with self._lock:
+            self.misses += count
+
+    def reset(self):
+        with self._lock:
+            self.hits = self.misses = 0
+
+    def snapshot(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+            }
+
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def get_cache_stats(name):
+    with _stats_lock:
+        if name not in _stats:
+            _stats[name] = CacheStats(name)
+        return _stats[name]
+
+
+def all_cache_stats():
+    with _stats_lock:
+        stats = list(_stats.values())
+    return {item.name: item.snapshot() for item in stats}
+
+
+class CacheStatsAPIView(APIView):
+    """
+    Hit/miss counters of the shared-cache wrappers and the L1 caches. The
+    counters are per process, so the response names the worker it came
+    from.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(
+            {
+                "pid": os.getpid(),
+                "shared": all_cache_stats(),
+                "local": all_local_cache_stats(),
+            }
+        )
+
+
+def get_version(key):
+    """
+    Current version stored under ``key``. A missing version starts from the
+    clock rather than from 1, so entries written under a version that was
+    evicted can never be read again.
+    """
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def get_versions(keys):
+    """
+    ``{key: version}`` for many version keys with one ``get_many``; missing
+    versions start from the clock as in ``get_version``.
+    """
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            version = time.time_ns()
+            if not cache.add(key, version, timeout=None):
+                version = cache.get(key, version)
+            versions[key] = version
+    return versions
+
+
+def bump_versions(keys):
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            pass
+
+
+STALE_TIMEOUT = 5 * 60
+LOCK_TIMEOUT = 30
+LOCK_WAIT = 5
+LOCK_POLL_INTERVAL = 0.05
+EARLY_REFRESH_BETA = 1.0
+
+
+def _store(key, compute, timeout, stale_timeout):
+    started = time.monotonic()
+    value = compute()
+    delta = time.monotonic() - started
+    entry = {"value": value, "expires": time.time() + timeout, "delta": delta}
+    cache.set(key, entry, timeout + stale_timeout)
+    return value
+
+
+def _is_fresh(entry, beta):
+    # Probabilistic early expiration: the closer the entry is to expiring
+    # and the longer it took to compute, the likelier a reader refreshes it
+    # ahead of time, so hot keys are rarely seen expired at all.
+    jitter = -entry["delta"] * beta * math.log(1.0 - random.random())
+    return time.time() + jitter < entry["expires"]
+
+
+def get_or_compute(
+    key,
+    compute,
+    timeout,
+    stale_timeout=STALE_TIMEOUT,
+    lock_timeout=LOCK_TIMEOUT,
+    beta=EARLY_REFRESH_BETA,
+    stats=None,
+):
+    """
+    Cached ``compute()`` that protects ``key`` from stampedes: only the
+    holder of a short ``<key>:lock`` recomputes; meanwhile others serve the
+    stale value, kept for ``stale_timeout`` past expiry, or wait for the
+    holder on a cold miss.
+    """
+    entry = cache.get(key)
+    if entry is not None and _is_fresh(entry, beta):
+        if stats is not None:
+            stats.hit()
+        return entry["value"]
+    if stats is not None:
+        stats.miss()
+    lock_key = f"{key}:lock"
+    deadline = time.monotonic() + LOCK_WAIT
+    while True:
+        if cache.add(lock_key, 1, lock_timeout):
+            try:
+                # Another worker may have stored the value between our read
+                # and taking the lock.
+                current = cache.get(key)
+                if _is_newer(current, entry):
+                    return current["value"]
+                return _store(key, compute, timeout, stale_timeout)
+            finally:
+                cache.delete(lock_key)
+        if entry is not None:
+            return entry["value"]
+        if time.monotonic() >= deadline:
+            return compute()
+        time.sleep(LOCK_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry["value"]
+
+
+def _is_newer(current, entry):
+    if current is None or current["expires"] <= time.time():
+        return False
+    return entry is None or current["expires"] != entry["expires"]
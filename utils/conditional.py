@@ -0,0 +1,32 @@
+import hashlib
+import json
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def make_etag(*parts):
+    payload = json.dumps(parts, default=str, separators=(",", ":"))
+    return quote_etag(hashlib.blake2b(payload.encode(), digest_size=16).hexdigest())
+
+
+def conditional_get(request, build, etag=None, last_modified=None):
+    """
+    Answers ``If-None-Match``/``If-Modified-Since`` with 304 when the
+    validators match, so ``build()`` (the serialization) only runs when the
+    client's copy is stale. ``last_modified`` is a datetime; HTTP dates
+    have whole-second precision, so only pass it for resources whose every
+    change moves it.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = Response(build(), status=status.HTTP_200_OK)
+    if etag:
+        response["ETag"] = etag
+    if timestamp:
+        response["Last-Modified"] = http_date(timestamp)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
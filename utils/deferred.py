@@ -0,0 +1,28 @@
+import threading
+
+from django.db import transaction
+
+
+class OnCommitBatch:
+    """
+    Collects keys (with optional values) while a transaction is open and
+    hands them to ``flush`` as one ``{key: set(values)}`` mapping once it
+    commits. Outside a transaction the flush runs immediately.
+    """
+
+    def __init__(self, flush):
+        self.flush = flush
+        self._local = threading.local()
+
+    def add(self, key, *values):
+        pending = getattr(self._local, "pending", None)
+        if pending is None:
+            pending = self._local.pending = {}
+        pending.setdefault(key, set()).update(values)
+        transaction.on_commit(self._flush_pending)
+
+    def _flush_pending(self):
+        pending = getattr(self._local, "pending", None)
+        if pending:
+            self._local.pending = {}
+            self.flush(pending)
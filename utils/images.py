@@ -0,0 +1,203 @@
+import io
+import logging
+import os
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models.functions import Now
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+VARIANT_WIDTHS = (150, 300, 600, 1200)
+VARIANT_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+# Cards are 150px wide on phones; 300px keeps them sharp on 2x screens.
+CARD_WIDTH = 300
+CARD_FORMAT = "webp"
+IMAGE_BATCH_SIZE = 20
+
+
+def render_variants(data):
+    """
+    Resizes the encoded image ``data`` to every width in VARIANT_WIDTHS
+    (never upscaling) and encodes each size in every format. Runs in a
+    worker process, so it only takes and returns bytes:
+    ``{(format, width): encoded}``.
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        # Let the JPEG decoder downscale while decoding large photos.
+        largest = VARIANT_WIDTHS[-1]
+        image.draft("RGB", (largest, largest * image.height // image.width))
+        image = ImageOps.exif_transpose(image).convert("RGB")
+    widths = sorted({min(width, image.width) for width in VARIANT_WIDTHS})
+    rendered = {}
+    for width in widths:
+        height = max(round(image.height * width / image.width), 1)
+        resized = image.resize((width, height), Image.LANCZOS)
+        for name, (pil_format, options) in VARIANT_FORMATS.items():
+            output = io.BytesIO()
+            resized.save(output, pil_format, **options)
+            rendered[(name, width)] = output.getvalue()
+    return rendered
+
+
+def save_variants(source, rendered):
+    """
+    Stores rendered variants next to ``source`` and returns the variants
+    map kept on the model: ``{"source": name, format: {width: name}}``.
+    """
+    directory, filename = os.path.split(source)
+    stem = os.path.splitext(filename)[0]
+    variants = {"source": source}
+    for (name, width), data in sorted(rendered.items()):
+        path = os.path.join(directory, "variants", f"{stem}-{width}w.{name}")
+        path = default_storage.save(path, ContentFile(data))
+        variants.setdefault(name, {})[str(width)] = path
+    return variants
+
+
+def variant_urls(variants, source):
+    """
+    ``{format: {width: url}}`` for srcset attributes; empty until the
+    variants of the current image are ready.
+    """
+    if not variants or variants.get("source") != source:
+        return {}
+    return {
+        name: {
+            width: default_storage.url(path)
+            for width, path in variants.get(name, {}).items()
+        }
+        for name in VARIANT_FORMATS
+        if name in variants
+    }
+
+
+def card_url(variants, image):
+    """
+    The smallest variant at least CARD_WIDTH wide (or the largest one for
+    small images); the original image until variants are ready.
+    """
+    if not image:
+        return None
+    urls = variant_urls(variants, image.name).get(CARD_FORMAT)
+    if not urls:
+        return image.url
+    widths = sorted(int(width) for width in urls)
+    width = next((width for width in widths if width >= CARD_WIDTH), widths[-1])
+    return urls[str(width)]
+
+
+class ImageVariantsSpec:
+    """
+    An image field whose variants are produced by the pipeline. Rows are
+    pending while their variants map is empty; the reset_replaced and
+    save_reset receivers reset the map whenever the image is replaced.
+    """
+
+    def __init__(
+        self, model, image_field, variants_field, on_update=None, touch_field=None
+    ):
+        self.model = model
+        self.image_field = image_field
+        self.variants_field = variants_field
+        self.on_update = on_update
+        self.touch_field = touch_field
+
+    def pending(self):
+        return (
+            self.model.objects.filter(**{self.variants_field: {}})
+            .exclude(**{f"{self.image_field}__isnull": True})
+            .exclude(**{self.image_field: ""})
+            .only("pk", self.image_field)
+            .order_by("pk")
+        )
+
+    def reset_replaced(self, sender, instance, raw=False, update_fields=None, **kwargs):
+        """
+        pre_save receiver: clears the variants map when the image name
+        changes, which queues the row for the pipeline again.
+        """
+        if raw or instance.pk is None:
+            return
+        if update_fields is not None and self.image_field not in update_fields:
+            return
+        previous = (
+            self.model.objects.filter(pk=instance.pk)
+            .values_list(self.image_field, flat=True)
+            .first()
+        )
+        if (previous or "") == (getattr(instance, self.image_field).name or ""):
+            return
+        setattr(instance, self.variants_field, {})
+        if update_fields is not None and self.variants_field not in update_fields:
+            setattr(instance, self._pending_reset, True)
+
+    def save_reset(self, sender, instance, **kwargs):
+        """
+        post_save receiver: writes the map cleared by reset_replaced when
+        ``update_fields`` left it out, once the new image name is stored.
+        """
+        if instance.__dict__.pop(self._pending_reset, False):
+            self.model.objects.filter(
+                pk=instance.pk,
+                **{self.image_field: getattr(instance, self.image_field).name},
+            ).update(**{self.variants_field: {}})
+
+    @property
+    def _pending_reset(self):
+        return f"_reset_{self.variants_field}"
+
+    def store(self, instance, source, variants):
+        fields = {self.variants_field: variants}
+        if self.touch_field:
+            fields[self.touch_field] = Now()
+        # Skip rows whose image was replaced while this one was processed.
+        updated = self.model.objects.filter(
+            pk=instance.pk, **{self.image_field: source}
+        ).update(**fields)
+        if updated and self.on_update is not None:
+            self.on_update(instance.pk)
+
+
+def _read(field_file):
+    with field_file.open("rb") as file:
+        return file.read()
+
+
+def _failed(source, error):
+    # Recorded so that a broken image is not retried forever; clearing the
+    # map queues it again.
+    logger.warning("Image variants failed for %s: %s", source, error)
+    return {"source": source, "error": f"{type(error).__name__}: {error}"}
+
+
+def process_pending_images(specs, executor, batch_size=IMAGE_BATCH_SIZE):
+    """
+    Renders variants for the next batch of pending images of every spec on
+    ``executor`` (a process pool in the worker). Storage I/O stays in this
+    process. Returns the number of images handled.
+    """
+    jobs = []
+    handled = 0
+    for spec in specs:
+        for instance in spec.pending()[:batch_size]:
+            handled += 1
+            source = getattr(instance, spec.image_field).name
+            try:
+                data = _read(getattr(instance, spec.image_field))
+            except Exception as error:
+                spec.store(instance, source, _failed(source, error))
+                continue
+            future = executor.submit(render_variants, data)
+            jobs.append((spec, instance, source, future))
+    for spec, instance, source, future in jobs:
+        try:
+            variants = save_variants(source, future.result())
+        except Exception as error:
+            variants = _failed(source, error)
+        spec.store(instance, source, variants)
+    return handled
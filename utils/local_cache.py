@@ -0,0 +1,273 @@
+import json
+import logging
+import os
+import select
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "cache_invalidation"
+LISTEN_POLL_TIMEOUT = 5
+LISTEN_RETRY_DELAY = 1
+LISTEN_MAX_RETRY_DELAY = 30
+
+_MISSING = object()
+
+
+class LocalCache:
+    """
+    Bounded in-process LRU cache placed in front of the shared cache.
+    Entries also expire after ``timeout`` seconds, which bounds staleness if
+    an invalidation is ever lost. Every instance is registered by name so
+    invalidation events can reach it.
+    """
+
+    def __init__(self, name, max_size=1000, timeout=300):
+        self.name = name
+        self.max_size = max_size
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by invalidations while ``get_or_set`` loads are in flight,
+        # so a value loaded before an invalidation is not stored after it.
+        self._generation = 0
+        self._key_generations = {}
+        self._loading = Counter()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        with _registry_lock:
+            _registry[name] = self
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def _store(self, key, value):
+        self._entries[key] = (value, time.monotonic() + self.timeout)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def set(self, key, value):
+        # Nothing needs invalidating before the first entry is stored.
+        ensure_listening()
+        with self._lock:
+            self._store(key, value)
+
+    def get_or_set(self, key, compute):
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        with self._lock:
+            self._loading[key] += 1
+            generation = (self._generation, self._key_generations.get(key, 0))
+        try:
+            value = compute()
+        finally:
+            with self._lock:
+                current = (self._generation, self._key_generations.get(key, 0))
+                self._loading[key] -= 1
+                if not self._loading[key]:
+                    del self._loading[key]
+                    self._key_generations.pop(key, None)
+        if current == generation:
+            ensure_listening()
+            with self._lock:
+                self._store(key, value)
+        return value
+
+    def get_many(self, keys):
+        found = {}
+        for key in keys:
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                found[key] = value
+        return found
+
+    def set_many(self, mapping):
+        ensure_listening()
+        with self._lock:
+            for key, value in mapping.items():
+                self._store(key, value)
+
+    def evict(self, key=None):
+        with self._lock:
+            if key is None:
+                self._generation += 1
+                self.invalidations += len(self._entries)
+                self._entries.clear()
+                return
+            if key in self._loading:
+                self._key_generations[key] = self._key_generations.get(key, 0) + 1
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def snapshot(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def _dispatch(cache_name, key=None):
+    with _registry_lock:
+        local_cache = _registry.get(cache_name)
+    if local_cache is not None:
+        local_cache.evict(key)
+
+
+def clear_local_caches():
+    with _registry_lock:
+        caches = list(_registry.values())
+    for local_cache in caches:
+        local_cache.evict()
+
+
+def all_local_cache_stats():
+    with _registry_lock:
+        caches = list(_registry.values())
+    return {local_cache.name: local_cache.snapshot() for local_cache in caches}
+
+
+class MemoryInvalidationBus:
+    """
+    Delivers invalidations within the current process only; used with
+    SQLite and in tests, where there is a single process anyway.
+    """
+
+    def publish(self, cache_name, key):
+        transaction.on_commit(lambda: _dispatch(cache_name, key))
+
+    def start(self):
+        pass
+
+
+class PostgresInvalidationBus:
+    """
+    Publishes invalidations with ``pg_notify``, which PostgreSQL delivers to
+    every listening worker when the publishing transaction commits, and
+    runs a daemon thread per worker that LISTENs and evicts L1 entries.
+    """
+
+    def __init__(self):
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.received = 0
+
+    def publish(self, cache_name, key):
+        payload = json.dumps({"cache": cache_name, "key": key})
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [CHANNEL, payload])
+        # Don't wait for our own notification to come back.
+        transaction.on_commit(lambda: _dispatch(cache_name, key))
+
+    def _running(self):
+        # A forked worker inherits the attribute but not the thread.
+        return self._thread is not None and self._pid == os.getpid()
+
+    def start(self):
+        if self._running():
+            return
+        with self._lock:
+            if self._running():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._listen, name="cache-invalidation", daemon=True
+            )
+            self._thread.start()
+
+    def _listen(self):
+        import psycopg2
+        from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+        delay = LISTEN_RETRY_DELAY
+        while True:
+            conn = None
+            try:
+                conn = psycopg2.connect(**connection.get_connection_params())
+                conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {CHANNEL}")
+                # Anything published while we were not listening is lost.
+                clear_local_caches()
+                delay = LISTEN_RETRY_DELAY
+                self._receive(conn)
+            except Exception:
+                logger.exception("Cache invalidation listener failed")
+                time.sleep(delay)
+                delay = min(delay * 2, LISTEN_MAX_RETRY_DELAY)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def _receive(self, conn):
+        while True:
+            if not select.select([conn], [], [], LISTEN_POLL_TIMEOUT)[0]:
+                continue
+            conn.poll()
+            while conn.notifies:
+                notify = conn.notifies.pop(0)
+                self.received += 1
+                try:
+                    event = json.loads(notify.payload)
+                    _dispatch(event["cache"], event.get("key"))
+                except (ValueError, KeyError, TypeError):
+                    logger.warning("Bad cache invalidation: %r", notify.payload)
+
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def get_invalidation_bus():
+    global _bus
+    if _bus is not None:
+        return _bus
+    with _bus_lock:
+        if _bus is None:
+            if connection.vendor == "postgresql":
+                _bus = PostgresInvalidationBus()
+            else:
+                _bus = MemoryInvalidationBus()
+        return _bus
+
+
+def ensure_listening():
+    get_invalidation_bus().start()
+
+
+def publish_invalidation(cache_name, key=None):
+    """
+    Evicts ``key`` (everything when None) from the named local cache in
+    every worker once the current transaction commits.
+    """
+    get_invalidation_bus().publish(cache_name, key)
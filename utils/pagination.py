@@ -0,0 +1,153 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.paginator import EmptyPage, Paginator
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+
+DEFAULT_PAGE_LIMIT = 10
+MAX_PAGE_LIMIT = 50
+
+
+def get_page_limit(request):
+    try:
+        limit = int(request.query_params.get("limit", DEFAULT_PAGE_LIMIT))
+    except ValueError:
+        raise ValidationError({"limit": "Must be an integer."})
+    return max(1, min(limit, MAX_PAGE_LIMIT))
+
+
+def _field_name(field):
+    return field.lstrip("-")
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def get_ordering_values(item, ordering):
+    return [getattr(item, _field_name(field)) for field in ordering]
+
+
+def encode_cursor(values, reverse=False):
+    values = [_encode_value(value) for value in values]
+    payload = json.dumps({"v": values, "r": reverse}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _decode_value(model, field, value):
+    if value is None or isinstance(value, (bool, dict, list)):
+        raise TypeError(value)
+    try:
+        model_field = model._meta.get_field(_field_name(field))
+    except FieldDoesNotExist:
+        # Annotations such as the search rank are numbers.
+        if not isinstance(value, (int, float)):
+            raise TypeError(value)
+        return value
+    return model_field.to_python(value)
+
+
+def decode_cursor(cursor, ordering, model):
+    """
+    Returns the ordering values and direction stored in ``cursor``; each
+    value is converted with the ``model`` field it orders by, so a
+    tampered cursor is a 400 rather than a database error.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values, reverse = payload["v"], payload["r"]
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise TypeError(values)
+        if not isinstance(reverse, bool):
+            raise TypeError(reverse)
+        values = [
+            _decode_value(model, field, value) for field, value in zip(ordering, values)
+        ]
+    except (binascii.Error, ValueError, TypeError, KeyError, DjangoValidationError):
+        raise ValidationError({"cursor": "Invalid cursor."})
+    return values, reverse
+
+
+def keyset_filter(ordering, values, reverse=False):
+    # (a, b) after (x, y) is: a after x, or a == x and b after y.
+    condition = Q()
+    for index, field in enumerate(ordering):
+        descending = field.startswith("-")
+        lookup = "gt" if descending == reverse else "lt"
+        equal = {
+            _field_name(previous): values[position]
+            for position, previous in enumerate(ordering[:index])
+        }
+        condition |= Q(**equal, **{f"{_field_name(field)}__{lookup}": values[index]})
+    return condition
+
+
+def _reverse_ordering(ordering):
+    return [
+        _field_name(field) if field.startswith("-") else f"-{field}"
+        for field in ordering
+    ]
+
+
+def paginate_by_cursor(queryset, cursor, limit, ordering):
+    """
+    Keyset pagination over ``ordering``: the page is read with a single
+    indexed range query, without COUNT(*) or OFFSET.
+    """
+    reverse = False
+    if cursor:
+        values, reverse = decode_cursor(cursor, ordering, queryset.model)
+        queryset = queryset.filter(keyset_filter(ordering, values, reverse))
+    if reverse:
+        queryset = queryset.order_by(*_reverse_ordering(ordering))
+    else:
+        queryset = queryset.order_by(*ordering)
+    items = list(queryset[: limit + 1])
+    has_more = len(items) > limit
+    items = items[:limit]
+    if not items:
+        return items, None, None
+    if reverse:
+        items.reverse()
+        has_next, has_prev = True, has_more
+    else:
+        has_next, has_prev = has_more, bool(cursor)
+    next_cursor = None
+    prev_cursor = None
+    if has_next:
+        next_cursor = encode_cursor(get_ordering_values(items[-1], ordering))
+    if has_prev:
+        prev_cursor = encode_cursor(get_ordering_values(items[0], ordering), True)
+    return items, next_cursor, prev_cursor
+
+
+def paginate(queryset, request, ordering):
+    """
+    Returns ``(items, meta)``. Page mode keeps the ``page``/``total`` response
+    shape; passing ``cursor`` (empty for the first page) switches to keyset
+    pagination and returns ``next``/``prev`` cursors instead.
+    """
+    limit = get_page_limit(request)
+    if "cursor" in request.query_params:
+        items, next_cursor, prev_cursor = paginate_by_cursor(
+            queryset, request.query_params["cursor"], limit, ordering
+        )
+        return items, {"next": next_cursor, "prev": prev_cursor}
+    try:
+        page_number = int(request.query_params.get("page", 1))
+    except ValueError:
+        raise ValidationError({"page": "Must be an integer."})
+    paginator = Paginator(queryset.order_by(*ordering), limit)
+    try:
+        items = list(paginator.page(page_number))
+    except EmptyPage:
+        items = []
+    return items, {"total": paginator.num_pages}
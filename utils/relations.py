@@ -0,0 +1,37 @@
+from django.db import connection
+
+
+def _table_and_columns(field):
+    quote = connection.ops.quote_name
+    table = field.remote_field.through._meta.db_table
+    return quote(table), quote(field.m2m_column_name()), quote(field.m2m_reverse_name())
+
+
+def add_relation(field, source_id, target_id):
+    """
+    Links ``source_id`` to ``target_id`` through the many-to-many ``field``
+    with a single INSERT ... ON CONFLICT DO NOTHING. Returns whether a row
+    was inserted.
+    """
+    table, source, target = _table_and_columns(field)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({source}, {target}) VALUES (%s, %s) "
+            "ON CONFLICT DO NOTHING",
+            [source_id, target_id],
+        )
+        return cursor.rowcount == 1
+
+
+def remove_relation(field, source_id, target_id):
+    """
+    Unlinks ``source_id`` from ``target_id`` with a single DELETE. Returns
+    whether a row was deleted.
+    """
+    table, source, target = _table_and_columns(field)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {table} WHERE {source} = %s AND {target} = %s",
+            [source_id, target_id],
+        )
+        return cursor.rowcount == 1
@@ -0,0 +1,311 @@
+import re
+import secrets
+import time
+import warnings
+from io import BytesIO
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import (
+    InMemoryUploadedFile,
+    TemporaryUploadedFile,
+)
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+from django.http import QueryDict
+from django.urls import reverse
+from django.utils.module_loading import import_string
+from django.utils.datastructures import MultiValueDict
+from PIL import Image
+from rest_framework import serializers, status
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+# Cloudinary refuses upload signatures older than an hour on its own side.
+TICKET_MAX_AGE = 600
+UPLOAD_FORMATS = ("jpg", "jpeg", "png", "webp")
+MAX_IMAGE_UPLOAD_SIZE = 10 * 1024 * 1024
+MAX_IMAGE_PIXELS = 40_000_000
+# The header with the format and dimensions must be within this prefix.
+IMAGE_SNIFF_LIMIT = 256 * 1024
+# Uploads larger than this are written to a temporary file.
+UPLOAD_SPOOL_THRESHOLD = 256 * 1024
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "JPEG"),
+    (b"\x89PNG\r\n\x1a\n", "PNG"),
+    (b"RIFF", "WEBP"),
+)
+LOCAL_TICKET_SALT = "utils.uploads.local-ticket"
+
+
+class UploadBackend:
+    """
+    Issues tickets that let a client upload one image straight to storage
+    under a key chosen here. The key embeds the user id, so a key can only
+    be attached by the user it was issued to.
+    """
+
+    prefix = ""
+
+    def make_key(self, upload_to, user):
+        return f"{self.prefix}{upload_to}/{user.pk}-{secrets.token_urlsafe(16)}"
+
+    def is_own_key(self, key, upload_to, user):
+        pattern = re.escape(f"{self.prefix}{upload_to}/{user.pk}-") + r"[\w-]{22}"
+        return re.fullmatch(pattern, key) is not None
+
+    def exists(self, key):
+        return default_storage.exists(key)
+
+    def issue_ticket(self, upload_to, user):
+        raise NotImplementedError
+
+
+class CloudinaryUploadBackend(UploadBackend):
+    """
+    Signed Cloudinary upload: the client posts ``fields`` and the file to
+    ``url``, and the stored public id is the key that
+    MediaCloudinaryStorage would have produced.
+    """
+
+    def __init__(self):
+        import cloudinary
+        from cloudinary_storage import app_settings
+
+        self.config = cloudinary.config()
+        self.tag = app_settings.MEDIA_TAG
+        prefix = app_settings.PREFIX.strip("/")
+        self.prefix = f"{prefix}/" if prefix else ""
+
+    def issue_ticket(self, upload_to, user):
+        from cloudinary.utils import api_sign_request, cloudinary_api_url
+
+        key = self.make_key(upload_to, user)
+        timestamp = int(time.time())
+        fields = {
+            "public_id": key,
+            "timestamp": timestamp,
+            "tags": self.tag,
+            "allowed_formats": ",".join(UPLOAD_FORMATS),
+        }
+        fields["signature"] = api_sign_request(fields, self.config.api_secret)
+        fields["api_key"] = self.config.api_key
+        return {
+            "url": cloudinary_api_url("upload", resource_type="image"),
+            "fields": fields,
+            "key": key,
+            "expires_at": timestamp + TICKET_MAX_AGE,
+        }
+
+
+class LocalUploadBackend(UploadBackend):
+    """
+    Stand-in for development and tests: the same ticket protocol, with
+    LocalUploadAPIView receiving the file into the default storage.
+    """
+
+    def issue_ticket(self, upload_to, user):
+        key = self.make_key(upload_to, user)
+        ticket = signing.dumps({"key": key}, salt=LOCAL_TICKET_SALT, compress=False)
+        return {
+            "url": reverse("cookscorner-local-upload"),
+            "fields": {"ticket": ticket},
+            "key": key,
+            "expires_at": int(time.time()) + TICKET_MAX_AGE,
+        }
+
+
+class ImageUploadHandler(FileUploadHandler):
+    """
+    Streams image uploads: the format is sniffed from the magic bytes and
+    the dimensions from the header as the first chunks arrive, and bodies
+    that are too large or not images are rejected without reading the
+    rest. Accepted files stay in memory up to UPLOAD_SPOOL_THRESHOLD and
+    go to a temporary file beyond that. The reason for a rejection is left
+    in ``request.upload_error``.
+    """
+
+    def __init__(self, request=None, max_size=MAX_IMAGE_UPLOAD_SIZE):
+        super().__init__(request)
+        self.max_size = max_size
+
+    def reject(self, message):
+        self.request.upload_error = message
+        raise StopUpload(connection_reset=True)
+
+    def handle_raw_input(
+        self, input_data, META, content_length, boundary, encoding=None
+    ):
+        # Leave some room for the other fields and the multipart framing.
+        if content_length > self.max_size + IMAGE_SNIFF_LIMIT:
+            self.request.upload_error = "The upload is too large."
+            return QueryDict(), MultiValueDict()
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.head = b""
+        self.image_format = None
+        self.size = 0
+        self.file = BytesIO()
+
+    def sniff(self, data):
+        self.head += data
+        if len(self.head) < 12 and data:
+            return
+        signature = next(
+            (name for magic, name in IMAGE_SIGNATURES if self.head.startswith(magic)),
+            None,
+        )
+        if signature == "WEBP" and self.head[8:12] != b"WEBP":
+            signature = None
+        if signature is None:
+            self.reject("The file is not a JPEG, PNG or WebP image.")
+        try:
+            # Only parses the header; nothing is decoded. MAX_IMAGE_PIXELS
+            # is stricter than Pillow's bomb warning.
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", Image.DecompressionBombWarning)
+                with Image.open(BytesIO(self.head)) as image:
+                    image_format, (width, height) = image.format, image.size
+        except Image.DecompressionBombError:
+            self.reject("The image dimensions are too large.")
+        except Exception:
+            if len(self.head) >= IMAGE_SNIFF_LIMIT or not data:
+                self.reject("The image is damaged.")
+            return
+        if image_format != signature:
+            self.reject("The image is damaged.")
+        if width * height > MAX_IMAGE_PIXELS:
+            self.reject("The image dimensions are too large.")
+        self.image_format = image_format
+        self.head = b""
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+        if self.size > self.max_size:
+            self.reject("The image is too large.")
+        if self.image_format is None:
+            self.sniff(raw_data)
+        if isinstance(self.file, BytesIO) and self.size > UPLOAD_SPOOL_THRESHOLD:
+            spooled = TemporaryUploadedFile(
+                self.file_name, self.content_type, 0, self.charset
+            )
+            spooled.write(self.file.getvalue())
+            self.file = spooled
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        if self.image_format is None:
+            self.sniff(b"")
+        self.file.seek(0)
+        if isinstance(self.file, TemporaryUploadedFile):
+            self.file.size = file_size
+            return self.file
+        return InMemoryUploadedFile(
+            file=self.file,
+            field_name=self.field_name,
+            name=self.file_name,
+            content_type=self.content_type,
+            size=file_size,
+            charset=self.charset,
+            content_type_extra=self.content_type_extra,
+        )
+
+
+class StreamingImageUploadMixin:
+    """
+    For APIViews receiving multipart images: installs ImageUploadHandler
+    before DRF parses the body.
+    """
+
+    def initialize_request(self, request, *args, **kwargs):
+        request.upload_handlers = [ImageUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
+
+
+def upload_error_response(request):
+    request.data  # Parsing runs the upload handler.
+    error = getattr(request, "upload_error", None)
+    if error is None:
+        return None
+    return Response({"Error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+
+def is_allowed_image(file):
+    try:
+        with Image.open(file) as image:
+            image_format = (image.format or "").lower()
+            image.verify()
+    except Exception:
+        return False
+    finally:
+        file.seek(0)
+    return image_format in UPLOAD_FORMATS
+
+
+def get_upload_backend():
+    return import_string(settings.UPLOAD_BACKEND)()
+
+
+def resolve_upload_key(key, upload_to, user):
+    """
+    Returns the storage name for an uploaded ``key`` after checking that it
+    was issued to ``user`` for ``upload_to`` and that the upload finished.
+    """
+    backend = get_upload_backend()
+    if not backend.is_own_key(key, upload_to, user):
+        raise serializers.ValidationError("Unknown upload key.")
+    if not backend.exists(key):
+        raise serializers.ValidationError("The file has not been uploaded.")
+    return key
+
+
+class UploadTicketAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+    upload_to = None
+
+    def post(self, request, *args, **kwargs):
+        ticket = get_upload_backend().issue_ticket(self.upload_to, request.user)
+        return Response(ticket, status=status.HTTP_201_CREATED)
+
+
+class LocalUploadAPIView(StreamingImageUploadMixin, APIView):
+    permission_classes = [AllowAny]
+    authentication_classes = []
+    parser_classes = [MultiPartParser]
+
+    def post(self, request, *args, **kwargs):
+        if not isinstance(get_upload_backend(), LocalUploadBackend):
+            return Response({"Error": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+        error = upload_error_response(request)
+        if error is not None:
+            return error
+        try:
+            ticket = signing.loads(
+                request.data.get("ticket", ""),
+                salt=LOCAL_TICKET_SALT,
+                max_age=TICKET_MAX_AGE,
+            )
+        except signing.BadSignature:
+            return Response(
+                {"Error": "Invalid or expired ticket."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        file = request.data.get("file")
+        if file is None:
+            return Response(
+                {"file": "Required field"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        if not is_allowed_image(file):
+            return Response(
+                {"file": "Unsupported image."}, status=status.HTTP_400_BAD_REQUEST
+            )
+        if default_storage.exists(ticket["key"]):
+            return Response(
+                {"Error": "The ticket has been used."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        key = default_storage.save(ticket["key"], file)
+        return Response({"key": key}, status=status.HTTP_201_CREATED)